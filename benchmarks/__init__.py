@@ -0,0 +1,6 @@
+"""
+Benchmarks for the DOCX → GCWeb HTML converters.
+
+  python -m benchmarks                      # run the suite, see --help
+  python -m benchmarks.synth out.docx       # just generate a synthetic document
+"""
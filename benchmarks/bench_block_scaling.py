@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for docx_to_gcweb_html.convert.
+
+Builds synthetic documents of increasing size (paragraphs, with a heading, a
+short list and a small table sprinkled in every 50 blocks) and times the
+conversion. The marginal cost of a block (the extra time per extra block
+between consecutive sizes) should stay roughly constant as the document
+grows; a quadratic block lookup shows up as a marginal cost that grows with
+the size. Total time per block is printed too, but it is not what --check
+looks at: the fixed cost of opening a document dominates it for small sizes.
+
+Usage:
+  python benchmarks/bench_block_scaling.py
+  python benchmarks/bench_block_scaling.py --sizes 100 1000 10000 100000 --check
+"""
+
+from __future__ import annotations
+import argparse
+import copy
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from docx import Document
+
+import docx_to_gcweb_html
+
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000]
+
+def build_document(n_paragraphs: int, path: Path) -> None:
+    """Write a .docx with roughly *n_paragraphs* body paragraphs to *path*."""
+    doc = Document()
+    heading = doc.add_paragraph("Section heading", style="Heading 2")._p
+    normal = doc.add_paragraph("Body text with some ")._p
+    run = doc.paragraphs[-1].add_run("bold")
+    run.bold = True
+    item = doc.add_paragraph("List item", style="List Bullet")._p
+    table = doc.add_table(rows=3, cols=3)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f"r{r}c{c}"
+    tbl = table._tbl
+
+    body = doc.element.body
+    templates = [heading, normal, item, tbl]
+    for el in templates:
+        body.remove(el)
+
+    # Insert copies before the trailing sectPr
+    sect_pr = body[-1]
+    for i in range(n_paragraphs):
+        if i % 50 == 0:
+            template = heading
+        elif i % 50 in (10, 11, 12):
+            template = item
+        elif i % 50 == 25:
+            template = tbl
+        else:
+            template = normal
+        sect_pr.addprevious(copy.deepcopy(template))
+    doc.save(str(path))
+
+def time_convert(path: Path, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        docx_to_gcweb_html.convert(path)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                    help="Paragraph counts to benchmark.")
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per size; the best time is reported.")
+    ap.add_argument("--check", action="store_true",
+                    help="Exit non-zero if the marginal per-block cost varies more than --max-ratio "
+                         "across sizes.")
+    ap.add_argument("--max-ratio", type=float, default=3.0)
+    args = ap.parse_args()
+
+    sizes = sorted(set(args.sizes))
+    if len(sizes) < 2:
+        ap.error("--sizes needs at least two distinct sizes")
+
+    marginal: List[float] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'blocks':>10} {'seconds':>10} {'us/block':>10} {'marginal':>10}")
+        prev = None
+        for n in sizes:
+            path = Path(tmp) / f"scaling_{n}.docx"
+            build_document(n, path)
+            # Big documents take long enough that a single run is representative
+            seconds = time_convert(path, args.repeat if n <= 10_000 else 1)
+            column = ""
+            if prev is not None:
+                # Extra time per extra block: the fixed per-document cost cancels out
+                us = (seconds - prev[1]) / (n - prev[0]) * 1e6
+                marginal.append(us)
+                column = f"{us:>10.1f}"
+            prev = (n, seconds)
+            print(f"{n:>10} {seconds:>10.3f} {seconds / n * 1e6:>10.1f} {column}")
+
+    # Timer noise can make a small step's marginal cost tiny (or negative); floor it
+    floor = max(marginal) / 100
+    ratio = max(marginal) / max(min(marginal), floor)
+    print(f"marginal per-block cost ratio (max/min): {ratio:.2f}")
+    if args.check and ratio > args.max_ratio:
+        print(f"FAIL: conversion does not scale linearly (ratio > {args.max_ratio})")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Inline rendering benchmark: docx_html.runs_to_html vs the python-docx Run-proxy
+implementation it replaced, over every paragraph of the bundled sample documents.
+
+The converters parse each paragraph into the IR (docx_ir) once and render the
+IR, so that is what is timed and checked: the paragraphs are parsed before
+the timed loop. The parse is timed separately and reported alongside.
+
+Usage:
+  python benchmarks/bench_runs_to_html.py
+  python benchmarks/bench_runs_to_html.py --check   # fail if less than --min-speedup faster
+"""
+
+from __future__ import annotations
+import argparse
+import html
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from docx import Document
+
+from docx_html import runs_to_html
+from docx_ir import PLAIN_PARSER
+
+SAMPLES = [
+    ROOT / "wet_boew_gcweb_style_sample.docx",
+    ROOT / "wet_boew_gcweb_style_sample_extended.docx",
+]
+
+def proxy_runs_to_html(paragraph) -> str:
+    """The previous implementation, built on python-docx Run proxies."""
+    parts: List[str] = []
+    for run in paragraph.runs:
+        if not run.text:
+            continue
+        frag = html.escape(run.text, quote=True).replace("\n", "<br/>")
+        if run.bold:
+            frag = f"<strong>{frag}</strong>"
+        if run.italic:
+            frag = f"<em>{frag}</em>"
+        if run.underline:
+            frag = f"<u>{frag}</u>"
+        parts.append(frag)
+    return "".join(parts) if parts else html.escape(paragraph.text, quote=True)
+
+def time_impl(fn: Callable, paragraphs: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for p in paragraphs:
+            fn(p)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=200, help="Passes over the paragraphs; the best is reported.")
+    ap.add_argument("--check", action="store_true", help="Exit non-zero if the speedup is below --min-speedup.")
+    ap.add_argument("--min-speedup", type=float, default=5.0)
+    args = ap.parse_args()
+
+    paragraphs = [p for path in SAMPLES for p in Document(str(path)).paragraphs]
+    elements = [p._p for p in paragraphs]
+    parsed = [PLAIN_PARSER.paragraph(el) for el in elements]
+    for p, ir in zip(paragraphs, parsed):
+        assert runs_to_html(ir) == proxy_runs_to_html(p), p.text
+
+    old = time_impl(proxy_runs_to_html, paragraphs, args.repeat)
+    parse = time_impl(PLAIN_PARSER.paragraph, elements, args.repeat)
+    new = time_impl(runs_to_html, parsed, args.repeat)
+    n = len(paragraphs)
+    print(f"{n} paragraphs")
+    print(f"python-docx proxies: {old / n * 1e6:8.2f} us/paragraph")
+    print(f"IR parse:            {parse / n * 1e6:8.2f} us/paragraph")
+    print(f"IR render:           {new / n * 1e6:8.2f} us/paragraph")
+    print(f"parse + render:      {(parse + new) / n * 1e6:8.2f} us/paragraph")
+    speedup = old / new
+    print(f"render speedup: {speedup:.1f}x (parse + render: {old / (parse + new):.1f}x)")
+    if args.check and speedup < args.min_speedup:
+        print(f"FAIL: speedup below {args.min_speedup}x")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
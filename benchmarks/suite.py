@@ -0,0 +1,183 @@
+"""
+Benchmark suite: time both converters on synthetic documents.
+
+For every (converter, engine, size) it reports throughput in nominal pages per
+second, peak RSS and a per-stage breakdown (the docx_profile stages), and can
+save the results as JSON and compare them with an earlier run to catch
+regressions:
+
+  python -m benchmarks --pages 10 100 1000 --output base.json
+  python -m benchmarks --pages 10 100 1000 --compare base.json
+
+Each measurement runs in a fresh process so peak RSS belongs to that
+conversion alone (peak RSS needs the Unix-only `resource` module; it is
+reported as null elsewhere).
+"""
+
+from __future__ import annotations
+import argparse
+import importlib
+import io
+import json
+import multiprocessing
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from benchmarks.synth import BLOCKS_PER_PAGE, MIXES, build_document
+
+ROOT = Path(__file__).resolve().parent.parent
+CONVERTERS = {"base": "docx_to_gcweb_html", "extended": "docx_to_gcweb_html_extended"}
+RESULTS_FORMAT = 1
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _measure(module_name: str, engine: str, docx_path: str, repeat: int) -> Dict[str, Any]:
+    """Runs in a fresh process: convert *docx_path* *repeat* times and time the stages."""
+    sys.path.insert(0, str(ROOT))
+    converter = importlib.import_module(module_name)
+    from docx_profile import Profiler
+
+    rss_before = _peak_rss_mb()
+    times: List[float] = []
+    for _ in range(repeat):
+        sink = io.StringIO()
+        t0 = time.perf_counter()
+        converter.convert_to_stream(Path(docx_path), sink, engine=engine)
+        times.append(time.perf_counter() - t0)
+    rss_peak = _peak_rss_mb()
+
+    # Stage breakdown from one more, profiled, run (after the timed ones, whose
+    # numbers must not include the profiler's own overhead)
+    profiler = Profiler()
+    converter.convert_to_stream(Path(docx_path), io.StringIO(), engine=engine, profiler=profiler)
+    profiler.finish()
+
+    return {
+        "seconds": min(times),
+        "peak_rss_mb": rss_peak,
+        "rss_before_mb": rss_before,
+        "stages": dict(sorted(profiler.totals.items(), key=lambda kv: kv[1], reverse=True)),
+    }
+
+def run_suite(pages: List[int], mix: str, converters: List[str], engines: List[str],
+              repeat: int, seed: int, log=None) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context("spawn")
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_pages in pages:
+            path = Path(tmp) / f"synth_{mix}_{n_pages}.docx"
+            stats = build_document(path, n_pages, mix, seed)
+            for name in converters:
+                for engine in engines:
+                    with ctx.Pool(1) as pool:
+                        m = pool.apply(_measure, (CONVERTERS[name], engine, str(path), repeat))
+                    m.update(converter=name, engine=engine, pages=n_pages, blocks=stats["blocks"],
+                             docx_bytes=path.stat().st_size, pages_per_sec=n_pages / m["seconds"])
+                    results.append(m)
+                    print(_format_row(m), file=log)
+    return {
+        "format": RESULTS_FORMAT,
+        "mix": mix,
+        "seed": seed,
+        "repeat": repeat,
+        "blocks_per_page": BLOCKS_PER_PAGE,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+def _format_row(m: Dict[str, Any]) -> str:
+    rss = f"{m['peak_rss_mb']:7.1f}MB" if m["peak_rss_mb"] is not None else "      n/a"
+    stages = "  ".join(f"{k} {v * 1000:.1f}ms" for k, v in m["stages"].items())
+    return (f"{m['converter']:8} {m['engine']:6} {m['pages']:6}p  {m['seconds']:8.3f}s  "
+            f"{m['pages_per_sec']:8.1f} p/s  rss {rss}  {stages}")
+
+def _key(m: Dict[str, Any]) -> tuple:
+    return m["converter"], m["engine"], m["pages"]
+
+# Settings that change the documents measured; runs that differ in them are not comparable
+DOCUMENT_SETTINGS = ("mix", "seed", "blocks_per_page")
+
+def mismatched_settings(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """The DOCUMENT_SETTINGS in which two runs (or a run and the settings of the next) differ."""
+    return [f"{k} {baseline.get(k)!r} vs {current.get(k)!r}"
+            for k in DOCUMENT_SETTINGS if baseline.get(k) != current.get(k)]
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float, log=None) -> int:
+    """
+    Print the throughput and peak RSS change for every measurement present in
+    both runs. Returns the number of regressions: measurements that got slower
+    (or use more memory) by more than *threshold* (0.10 = 10%). Runs over
+    different documents (see DOCUMENT_SETTINGS) raise ValueError.
+    """
+    mismatched = mismatched_settings(baseline, current)
+    if mismatched:
+        raise ValueError(f"baseline measured other documents: {', '.join(mismatched)}")
+    before = {_key(m): m for m in baseline["results"]}
+    regressions = 0
+    for m in current["results"]:
+        old = before.get(_key(m))
+        if old is None:
+            continue
+        speed = m["pages_per_sec"] / old["pages_per_sec"] - 1
+        flags = []
+        if speed < -threshold:
+            flags.append("SLOWER")
+        rss = ""
+        if m["peak_rss_mb"] and old["peak_rss_mb"]:
+            growth = m["peak_rss_mb"] / old["peak_rss_mb"] - 1
+            rss = f"  rss {growth:+7.1%}"
+            if growth > threshold:
+                flags.append("MORE MEMORY")
+        regressions += bool(flags)
+        print(f"{m['converter']:8} {m['engine']:6} {m['pages']:6}p  throughput {speed:+7.1%}{rss}  "
+              f"{' '.join(flags)}", file=log)
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m benchmarks",
+                                 description="Benchmark the DOCX → GCWeb HTML converters on synthetic documents.")
+    ap.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000],
+                    help=f"Document sizes in nominal pages of {BLOCKS_PER_PAGE} blocks.")
+    ap.add_argument("--mix", choices=sorted(MIXES), default="all", help="Block mix of the synthetic documents.")
+    ap.add_argument("--converters", nargs="+", choices=sorted(CONVERTERS), default=sorted(CONVERTERS))
+    ap.add_argument("--engines", nargs="+", choices=("docx", "stream"), default=["docx", "stream"])
+    ap.add_argument("--repeat", type=int, default=3, help="Conversions per measurement; the fastest counts.")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--output", metavar="JSON", help="Save the results to JSON.")
+    ap.add_argument("--compare", metavar="JSON", help="Compare with results saved by an earlier --output.")
+    ap.add_argument("--threshold", type=float, default=0.10,
+                    help="Relative slowdown/memory growth counted as a regression (default 0.10).")
+    args = ap.parse_args()
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        settings = {"mix": args.mix, "seed": args.seed, "blocks_per_page": BLOCKS_PER_PAGE}
+        mismatched = mismatched_settings(baseline, settings)
+        if mismatched:
+            ap.error(f"--compare baseline measured other documents: {', '.join(mismatched)}")
+
+    current = run_suite(args.pages, args.mix, args.converters, args.engines, args.repeat, args.seed)
+    if args.output:
+        Path(args.output).write_text(json.dumps(current, indent=2), encoding="utf-8")
+    if baseline is not None:
+        print()
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Synthetic DOCX generator for the benchmarks.
+
+Documents are built from the bundled extended sample (so every "WET ..." style
+exists) out of units of related blocks: headings, body text with inline
+formatting, typography/alert/button paragraphs, lists, marker + table,
+accordions, pagination and details. A mix gives each unit kind a weight;
+size is given in nominal pages of BLOCKS_PER_PAGE body blocks.
+
+Usage:
+  python -m benchmarks.synth out.docx --pages 50 --mix components
+"""
+
+from __future__ import annotations
+import argparse
+import random
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from docx import Document
+
+TEMPLATE = Path(__file__).resolve().parent.parent / "wet_boew_gcweb_style_sample_extended.docx"
+
+# A nominal page, used to express document sizes and throughput (pages/sec)
+BLOCKS_PER_PAGE = 20
+
+WORDS = ("service program benefit application eligibility federal provincial "
+         "payment deadline form citizen policy report annex statistics table").split()
+
+MIXES: Dict[str, Dict[str, int]] = {
+    "all": {"heading": 2, "text": 8, "typography": 2, "alert": 1, "button": 1,
+            "list": 2, "table": 1, "accordion": 1, "pagination": 1, "details": 1},
+    "text": {"heading": 1, "text": 12, "typography": 1, "list": 2},
+    "components": {"heading": 1, "text": 2, "accordion": 3, "pagination": 2, "details": 3, "alert": 2},
+    "tables": {"heading": 1, "text": 2, "table": 4},
+}
+
+def _sentence(rnd: random.Random, n_words: int) -> str:
+    return " ".join(rnd.choice(WORDS) for _ in range(n_words)).capitalize() + "."
+
+class _Builder:
+    def __init__(self, doc, rnd: random.Random):
+        self.doc = doc
+        self.rnd = rnd
+        self.blocks = 0
+        wet_styles = sorted(s.name for s in doc.styles if s.type == 1 and s.name.startswith("WET "))
+        self.typography_styles = [n for n in wet_styles
+                           if n.split()[1] in ("Lead", "Small", "Muted", "Blockquote", "Pull", "Text", "Badge")]
+        self.alert_styles = [n for n in wet_styles if n.split()[1] in ("Alert", "Well")]
+        self.button_styles = [n for n in wet_styles if n.split()[1] == "Button"]
+        self.table_marker_styles = [n for n in wet_styles if n.startswith("WET Table ")]
+
+    def para(self, style: str, text: str) -> None:
+        self.doc.add_paragraph(text, style=style)
+        self.blocks += 1
+
+    def heading(self):
+        self.para(f"Heading {self.rnd.randint(1, 3)}", _sentence(self.rnd, 4))
+
+    def text(self):
+        p = self.doc.add_paragraph(style="Normal")
+        for _ in range(self.rnd.randint(3, 6)):
+            run = p.add_run(_sentence(self.rnd, self.rnd.randint(5, 12)) + " ")
+            kind = self.rnd.random()
+            if kind < 0.15:
+                run.bold = True
+            elif kind < 0.25:
+                run.italic = True
+            elif kind < 0.30:
+                run.underline = True
+        self.blocks += 1
+
+    def typography(self):
+        self.para(self.rnd.choice(self.typography_styles), _sentence(self.rnd, 10))
+
+    def alert(self):
+        self.para(self.rnd.choice(self.alert_styles), _sentence(self.rnd, 10))
+
+    def button(self):
+        self.para(self.rnd.choice(self.button_styles), _sentence(self.rnd, 3))
+
+    def list(self):
+        style = self.rnd.choice(("List Bullet", "List Number"))
+        for _ in range(self.rnd.randint(3, 8)):
+            self.para(style, _sentence(self.rnd, 6))
+
+    def table(self):
+        self.para(self.rnd.choice(self.table_marker_styles), "Table marker")
+        rows, cols = self.rnd.randint(3, 10), self.rnd.randint(2, 5)
+        table = self.doc.add_table(rows=rows, cols=cols)
+        for r, row in enumerate(table.rows):
+            for c, cell in enumerate(row.cells):
+                cell.text = _sentence(self.rnd, 2) if r == 0 else str(self.rnd.randint(0, 10_000))
+        self.blocks += 1
+
+    def accordion(self):
+        self.para("WET Accordion Start", "")
+        for _ in range(self.rnd.randint(2, 4)):
+            self.para("WET Accordion Heading", _sentence(self.rnd, 4))
+            for _ in range(self.rnd.randint(1, 3)):
+                self.para("WET Accordion Panel", _sentence(self.rnd, 15))
+        self.para("WET Accordion End", "")
+
+    def pagination(self):
+        self.para("WET Pagination Start", "")
+        self.para("WET Pagination Disabled", "Previous")
+        self.para("WET Pagination Active", "1")
+        for i in range(2, self.rnd.randint(3, 6)):
+            self.para("WET Pagination Item", str(i))
+        self.para("WET Pagination Item", "Next")
+        self.para("WET Pagination End", "")
+
+    def details(self):
+        self.para("WET Details Summary", _sentence(self.rnd, 5))
+        for _ in range(self.rnd.randint(1, 3)):
+            self.para("WET Details Content", _sentence(self.rnd, 15))
+
+def build_document(path: Path, pages: int = 10, mix: str = "all", seed: int = 0) -> Dict[str, int]:
+    """
+    Write a synthetic document of about *pages* nominal pages to *path*.
+    Returns {"blocks": ..., "pages": ...}.
+    """
+    weights = MIXES[mix]
+    rnd = random.Random(seed)
+    doc = Document(str(TEMPLATE))
+    body = doc.element.body
+    for el in list(body)[:-1]:  # keep the trailing sectPr
+        body.remove(el)
+
+    builder = _Builder(doc, rnd)
+    kinds: List[str] = list(weights)
+    units: List[Callable[[], None]] = [getattr(builder, k) for k in kinds]
+    target = pages * BLOCKS_PER_PAGE
+    while builder.blocks < target:
+        rnd.choices(units, weights=[weights[k] for k in kinds])[0]()
+    doc.save(str(path))
+    return {"blocks": builder.blocks, "pages": pages}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("output", help="Path of the .docx to write")
+    ap.add_argument("--pages", type=int, default=10)
+    ap.add_argument("--mix", choices=sorted(MIXES), default="all")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    stats = build_document(Path(args.output), args.pages, args.mix, args.seed)
+    print(f"{args.output}: {stats['blocks']} blocks (~{stats['pages']} pages)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Asyncio API for the DOCX → GCWeb HTML converters.
+
+The converters are synchronous and CPU-bound; calling them from a coroutine
+stalls the event loop. AsyncConverter runs them on a bounded thread pool and
+hands the page back as an async iterator of HTML chunks while it is being
+converted:
+
+    converter = AsyncConverter(docx_to_gcweb_html_extended.convert_to_stream)
+    async for chunk in converter.convert(upload_bytes):
+        await response.write(chunk)
+
+(each converter module also has convert_async(source), backed by a shared
+AsyncConverter with the default limits).
+
+- Sources: a path, the .docx bytes (bytes/bytearray/memoryview), a binary
+  file object, an async stream with a read() coroutine (asyncio.StreamReader,
+  aiohttp, ...) or an async iterable of bytes.
+- Limits: at most *max_concurrency* conversions run at once per event loop;
+  further calls wait their turn. The pool has *max_workers* threads.
+- Back-pressure: a conversion pauses once *max_pending_chunks* chunks are
+  waiting for a slow consumer.
+- Cancellation: cancelling the consuming task, or closing the iterator early,
+  stops the conversion at its next write.
+
+Threads keep the event loop responsive but share the GIL; for parallel CPU
+throughput across many documents use the process-based server (docx_server).
+"""
+
+from __future__ import annotations
+import asyncio
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional
+
+from docx_cache import ConvertToStream
+from docx_reader import DocxSource
+
+DEFAULT_CHUNK_SIZE = 64 * 1024  # characters
+DEFAULT_MAX_PENDING_CHUNKS = 4
+_READ_SIZE = 1 << 16
+
+class ConversionCancelled(Exception):
+    """Raised inside the worker thread to abandon a conversion nobody is waiting for."""
+
+class _Finished(NamedTuple):
+    error: Optional[BaseException]
+
+class _ChunkWriter:
+    """
+    Text stream handed to convert_to_stream() in the worker thread. Writes are
+    batched into chunks and posted to the event loop's queue; a semaphore caps
+    the chunks in flight.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue,
+                 chunk_size: int, max_pending_chunks: int):
+        self._loop = loop
+        self._queue = queue
+        self._chunk_size = chunk_size
+        self._slots = threading.Semaphore(max_pending_chunks)
+        self._buf: List[str] = []
+        self._size = 0
+        self.cancelled = False
+
+    def write(self, s: str) -> None:
+        if self.cancelled:
+            raise ConversionCancelled()
+        self._buf.append(s)
+        self._size += len(s)
+        if self._size >= self._chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buf:
+            return
+        chunk = "".join(self._buf)
+        self._buf.clear()
+        self._size = 0
+        self._slots.acquire()
+        if self.cancelled:
+            raise ConversionCancelled()
+        self._post(chunk)
+
+    def finish(self, error: Optional[BaseException]) -> None:
+        self._post(_Finished(error))
+
+    def _post(self, item: Any) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        except RuntimeError:  # event loop already closed
+            self.cancelled = True
+
+    # Event loop side
+    def taken(self) -> None:
+        self._slots.release()
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        self._slots.release()  # wake a writer waiting for a slot
+
+def _run(convert_to_stream: ConvertToStream, source: DocxSource, engine: str,
+         writer: _ChunkWriter) -> None:
+    """Worker thread: convert and report the outcome through the writer."""
+    try:
+        convert_to_stream(source, writer, engine=engine)
+        writer.flush()
+    except BaseException as e:
+        writer.finish(e)
+    else:
+        writer.finish(None)
+
+async def read_source(source: Any) -> DocxSource:
+    """
+    Resolve *source* to something the converters read directly: paths, bytes and
+    (blocking) binary files pass through to the worker thread; async streams
+    are read to the end here.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, str, os.PathLike)):
+        return source
+    read = getattr(source, "read", None)
+    if read is not None and not asyncio.iscoroutinefunction(read):
+        return source
+    if read is not None:
+        parts: List[bytes] = []
+        while True:
+            part = await read(_READ_SIZE)
+            if not part:
+                break
+            parts.append(part)
+        return b"".join(parts)
+    if hasattr(source, "__aiter__"):
+        return b"".join([part async for part in source])
+    raise TypeError(f"Cannot convert from {type(source).__name__}: expected a path, "
+                    "bytes, a binary file or an async stream")
+
+class AsyncConverter:
+    """Runs one converter's convert_to_stream() for coroutines, with bounded concurrency."""
+
+    def __init__(self, convert_to_stream: ConvertToStream, max_workers: Optional[int] = None,
+                 max_concurrency: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_pending_chunks: int = DEFAULT_MAX_PENDING_CHUNKS):
+        self.convert_to_stream = convert_to_stream
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_concurrency = max_concurrency or self.max_workers
+        self.chunk_size = chunk_size
+        self.max_pending_chunks = max_pending_chunks
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="docx-convert")
+        # An asyncio.Semaphore is bound to the loop it first waits on, so each loop gets its own
+        self._limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+
+    def _limit(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        limit = self._limits.get(loop)
+        if limit is None:
+            limit = self._limits[loop] = asyncio.Semaphore(self.max_concurrency)
+        return limit
+
+    async def convert(self, source: Any, engine: str = "docx") -> AsyncIterator[str]:
+        """
+        Yield the converted page as HTML chunks; joined, they equal convert()'s output.
+        Conversion errors are raised from the iteration.
+        """
+        data = await read_source(source)
+        loop = asyncio.get_running_loop()
+        limit = self._limit(loop)
+        await limit.acquire()
+        queue: asyncio.Queue = asyncio.Queue()
+        writer = _ChunkWriter(loop, queue, self.chunk_size, self.max_pending_chunks)
+        try:
+            future = loop.run_in_executor(self._executor, _run, self.convert_to_stream,
+                                          data, engine, writer)
+        except BaseException:
+            limit.release()
+            raise
+        # The slot is given back when the worker is really done, even after a cancellation
+        future.add_done_callback(lambda _: limit.release())
+        try:
+            while True:
+                item = await queue.get()
+                if isinstance(item, _Finished):
+                    if item.error is not None:
+                        raise item.error
+                    return
+                writer.taken()
+                yield item
+        finally:
+            if not future.done():
+                writer.cancel()
+
+    def close(self) -> None:
+        """Stop the worker threads; conversions already running are abandoned."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+_shared: Dict[ConvertToStream, AsyncConverter] = {}
+
+def shared_async_converter(convert_to_stream: ConvertToStream) -> AsyncConverter:
+    """Per-process AsyncConverter with the default limits, one per converter."""
+    if convert_to_stream not in _shared:
+        _shared[convert_to_stream] = AsyncConverter(convert_to_stream)
+    return _shared[convert_to_stream]
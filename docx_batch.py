@@ -0,0 +1,104 @@
+"""
+Batch directory conversion for the DOCX → GCWeb HTML converters.
+
+Every .docx under the input directory is converted into the output directory
+(same relative path, .html suffix) by a pool of worker processes. Workers are
+started once and reused for the whole run, so python-docx/lxml are imported
+once per worker rather than once per file. A failing file is reported and the
+run carries on; the return value is the number of failures.
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional, TextIO, Tuple
+
+from docx_cache import DEFAULT_MAX_BYTES, ConvertToStream, cached_convert_to_stream, open_cache
+from docx_ir import gc_paused
+from docx_media import AssetOptions
+
+def add_batch_arguments(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--batch", metavar="DIR", help="Convert every .docx under DIR (recursively).")
+    ap.add_argument("--out-dir", metavar="DIR", help="Output directory for --batch.")
+    ap.add_argument("--jobs", type=int, default=None,
+                    help="Worker processes for --batch/--serve (default: number of CPUs).")
+
+def find_docx_files(in_dir: Path) -> List[Path]:
+    # Skip Word's "~$name.docx" lock files
+    return sorted(p for p in in_dir.rglob("*.docx") if p.is_file() and not p.name.startswith("~$"))
+
+def _warm_up() -> None:
+    # Pay the python-docx/lxml import once per worker, not in the first file's timing
+    import docx  # noqa: F401
+    import lxml.etree  # noqa: F401
+
+def _convert_one(convert_to_stream: ConvertToStream, src: Path, dst: Path, engine: str,
+                 cache_dir: Optional[Path], cache_max_bytes: int,
+                 fingerprint: Optional[str], assets: Optional[AssetOptions]) -> Tuple[float, Optional[str], bool]:
+    """Convert one file; returns (seconds, error message or None, served from cache)."""
+    t0 = time.perf_counter()
+    tmp = dst.with_name(dst.name + ".tmp")
+    cached = False
+    try:
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        # A batch worker process is ours: no collections while the document's records pile up
+        with gc_paused(), open(tmp, "w", encoding="utf-8") as f:
+            if cache_dir is not None and fingerprint is not None:
+                cache = open_cache(cache_dir, cache_max_bytes)
+                cached = cached_convert_to_stream(convert_to_stream, src, f, cache, fingerprint, engine, assets)
+            else:
+                convert_to_stream(src, f, engine=engine)
+        os.replace(tmp, dst)
+    except Exception as e:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        return time.perf_counter() - t0, f"{type(e).__name__}: {e}", False
+    return time.perf_counter() - t0, None, cached
+
+def run_batch(convert_to_stream: ConvertToStream, in_dir: Path, out_dir: Path,
+              jobs: Optional[int] = None, engine: str = "docx",
+              cache_dir: Optional[Path] = None, cache_max_bytes: int = DEFAULT_MAX_BYTES,
+              fingerprint: Optional[str] = None, assets: Optional[AssetOptions] = None,
+              log: Optional[TextIO] = None) -> int:
+    """
+    Convert every .docx under *in_dir* into *out_dir* with *jobs* worker processes.
+    *convert_to_stream* must be a module-level function (it is sent to the workers).
+    With *cache_dir* and the converter's *fingerprint*, unchanged documents are
+    served from the conversion cache (see docx_cache); pass the *assets* that
+    *convert_to_stream* writes images to, so cached pages get theirs too.
+    Prints one line per file plus a summary to *log* (default stdout).
+    """
+    files = find_docx_files(in_dir)
+    failures = 0
+    hits = 0
+    t0 = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_warm_up) as pool:
+        futures = {
+            pool.submit(_convert_one, convert_to_stream, src,
+                        out_dir / src.relative_to(in_dir).with_suffix(".html"), engine,
+                        cache_dir, cache_max_bytes, fingerprint, assets): src
+            for src in files
+        }
+        for fut in as_completed(futures):
+            rel = futures[fut].relative_to(in_dir)
+            try:
+                seconds, error, cached = fut.result()
+            except Exception as e:  # worker died (e.g. killed by the OS)
+                seconds, error, cached = 0.0, f"{type(e).__name__}: {e}", False
+            if error:
+                failures += 1
+                print(f"FAIL {seconds:8.3f}s  {rel}: {error}", file=log)
+            else:
+                hits += cached
+                print(f"ok   {seconds:8.3f}s  {rel}{' (cached)' if cached else ''}", file=log)
+
+    elapsed = time.perf_counter() - t0
+    print(f"{len(files) - failures} converted ({hits} from cache), {failures} failed, "
+          f"{len(files)} files in {elapsed:.2f}s", file=log)
+    return failures
@@ -0,0 +1,338 @@
+"""
+On-disk caches for the DOCX → GCWeb HTML converters.
+
+ConversionCache holds converted pages. Entries are keyed by a hash of the
+.docx bytes plus a converter fingerprint (converter name and version,
+STYLE_MAP, TABLE_STYLE_TO_CLASS), so editing a document or a mapping table
+naturally misses the cache.
+
+ParseCache holds parsed documents: the IR blocks (docx_ir) of a .docx, keyed
+by its content hash and the IR format only. The IR carries style names, not
+their mapping, so after a change to STYLE_MAP or TABLE_STYLE_TO_CLASS every
+page is re-rendered from the cache without inflating or parsing any XML (the
+package is opened only if images are extracted). An entry is a marshal
+record per RECORD_BLOCKS blocks (their plain tuples, docx_ir.block_to_data())
+and an end record. It is written while the document is parsed and read back block by
+block, so neither holds the whole document in memory (--engine stream stays
+flat). Records load several times faster than the document parses and, being
+data only, never run code when loaded. An entry that fails to load is a miss:
+the document is parsed after all, picking up where the entry broke off.
+
+Each directory is kept under a size bound by evicting least-recently-used
+entries.
+
+Layout: <cache_dir>/<key[:2]>/<key>.html (ConversionCache) or <key>.ir (ParseCache)
+"""
+
+from __future__ import annotations
+import argparse
+import hashlib
+import io
+import itertools
+import marshal
+import os
+import shutil
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterator, Optional, TextIO, Tuple
+
+from docx_ir import IR_FORMAT, Block, ImagePart, block_from_data, block_to_data, iter_document
+from docx_media import AssetOptions, extract_images
+from docx_profile import NULL_PROFILER, Profiler
+from docx_reader import DocxPackage, DocxSource
+
+DEFAULT_MAX_BYTES = 512 * 2**20
+DEFAULT_PARSE_MAX_BYTES = 2048 * 2**20
+RECORD_BLOCKS = 256  # blocks per ParseCache record: bounds memory, amortizes marshal calls
+
+# A converter's convert_to_stream(docx_path, fileobj, engine=..., ...), or a partial of it
+ConvertToStream = Callable[..., None]
+
+def add_cache_arguments(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--cache-dir", metavar="DIR",
+                    help="Reuse HTML from earlier runs for unchanged documents and mappings.")
+    ap.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // 2**20,
+                    help="Size bound for --cache-dir; least recently used entries are evicted.")
+    ap.add_argument("--parse-cache", metavar="DIR",
+                    help="Keep parsed documents in DIR, so unchanged documents are re-rendered "
+                         "(e.g. after a mapping change) without being parsed again.")
+    ap.add_argument("--parse-cache-max-mb", type=int, default=DEFAULT_PARSE_MAX_BYTES // 2**20,
+                    help="Size bound for --parse-cache; least recently used entries are evicted.")
+
+def mapping_fingerprint(name: str, version: str, *tables: dict) -> str:
+    """Fingerprint of everything besides the input that determines a converter's output."""
+    h = hashlib.sha256(repr((name, version)).encode("utf-8"))
+    for table in tables:
+        h.update(repr(sorted(table.items())).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def source_digest(source: DocxSource) -> Tuple[str, DocxSource]:
+    """
+    SHA-256 of the .docx bytes of *source*, and what to read the document from
+    afterwards: *source* itself (a seekable file is rewound), or the bytes of
+    a stream that can only be read once.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return file_digest(Path(source)), source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest(), source
+    if getattr(source, "seekable", lambda: False)():
+        start = source.tell()
+        h = hashlib.sha256()
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            h.update(chunk)
+        source.seek(start)
+        return h.hexdigest(), source
+    data = source.read()
+    return hashlib.sha256(data).hexdigest(), data
+
+_store_ids = itertools.count()
+
+class ConversionCache:
+    """Size-bounded LRU cache of converted HTML, stored as one file per entry."""
+
+    SUFFIX = ".html"
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        # key -> size, least recently used first; loaded lazily from the directory
+        self._index: Optional[OrderedDict[str, int]] = None
+        self._total = 0
+
+    def key_for(self, docx_path: Path, fingerprint: str) -> str:
+        return hashlib.sha256(f"{file_digest(docx_path)}:{fingerprint}".encode("ascii")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{self.SUFFIX}"
+
+    def _load_index(self) -> OrderedDict[str, int]:
+        if self._index is None:
+            entries = []
+            if self.cache_dir.is_dir():
+                for p in self.cache_dir.glob(f"*/*{self.SUFFIX}"):
+                    try:
+                        st = p.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, p.stem, st.st_size))
+            entries.sort()
+            self._index = OrderedDict((key, size) for _, key, size in entries)
+            self._total = sum(self._index.values())
+        return self._index
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Return the entry's path (marking it recently used), or None on a miss."""
+        path = self._path(key)
+        try:
+            os.utime(path)  # mtime doubles as the LRU timestamp across runs
+        except OSError:
+            return None
+        index = self._load_index()
+        if key in index:
+            index.move_to_end(key)
+        return path
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.lookup(key)
+        if path is None:
+            return None
+        return path.read_text(encoding="utf-8")
+
+    @contextmanager
+    def store(self, key: str, binary: bool = False) -> Iterator[IO]:
+        """
+        Open a new entry for writing (as text, or *binary*). It becomes visible
+        only if the block completes without raising; otherwise the partial file
+        is discarded.
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per write: a parse cache entry stays open while its document is parsed
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{next(_store_ids)}.tmp")
+        try:
+            with (open(tmp, "wb") if binary else open(tmp, "w", encoding="utf-8")) as f:
+                yield f
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            raise
+        self._add(key, path.stat().st_size)
+
+    def put(self, key: str, html_text: str) -> None:
+        with self.store(key) as f:
+            f.write(html_text)
+
+    def _add(self, key: str, size: int) -> None:
+        index = self._load_index()
+        self._total += size - index.pop(key, 0)
+        index[key] = size
+        while self._total > self.max_bytes and len(index) > 1:
+            old_key, old_size = index.popitem(last=False)
+            self._total -= old_size
+            try:
+                self._path(old_key).unlink()
+            except OSError:
+                pass  # already evicted by another process
+
+class _LazyPackage:
+    """The package of a document served from the ParseCache, opened on the first part read."""
+
+    def __init__(self, source: DocxSource):
+        self.source = source
+        self.package: Optional[DocxPackage] = None
+
+    def related_part(self, r_id: str) -> Optional[Tuple[str, bytes]]:
+        if self.package is None:
+            self.package = DocxPackage(self.source)
+        return self.package.related_part(r_id)
+
+    def close(self) -> None:
+        if self.package is not None:
+            self.package.close()
+
+class ParseCache(ConversionCache):
+    """
+    Size-bounded LRU cache of parsed documents (their docx_ir blocks). It
+    pickles as a reference to the process's open_parse_cache() for the same
+    directory, so it can ride along to batch and server workers with the other
+    converter options.
+    """
+
+    SUFFIX = ".ir"
+
+    def key_for_digest(self, digest: str) -> str:
+        return hashlib.sha256(f"{digest}:ir{IR_FORMAT}".encode("ascii")).hexdigest()
+
+    def document(self, source: DocxSource, engine: str = "docx",
+                 profiler: Optional[Profiler] = None) -> Tuple[Iterator[Block], ImagePart]:
+        """
+        docx_ir.iter_document() with the cache in front of it: on a hit the
+        blocks are read from the cache one at a time; on a miss the document is
+        parsed as usual and each block stored as it goes by (the entry exists
+        once the last one has been read).
+        """
+        profiler = profiler or NULL_PROFILER
+        with profiler.stage("parse_cache"):
+            digest, source = source_digest(source)
+            key = self.key_for_digest(digest)
+            path = self.lookup(key)
+        if path is not None:
+            package = _LazyPackage(source)
+            return self._served(key, path, source, engine, profiler, package), package.related_part
+        parsed, image_part = iter_document(source, engine, profiler)
+        return self._recorded(key, parsed, profiler), image_part
+
+    def _served(self, key: str, path: Path, source: DocxSource, engine: str, profiler: Profiler,
+                package: _LazyPackage) -> Iterator[Block]:
+        served = 0
+        try:
+            try:
+                with open(path, "rb") as f:
+                    while True:
+                        with profiler.stage("parse_cache"):
+                            record = marshal.load(f)
+                            if record is None:  # the end record
+                                return
+                            blocks = [block_from_data(data) for data in record]
+                        for block in blocks:
+                            served += 1
+                            yield block
+            except Exception:  # a truncated (disk full, ...), evicted or foreign entry is a miss
+                pass
+            # Parse the document after all (storing it anew) and carry on after the blocks served
+            parsed, _ = iter_document(source, engine, profiler)
+            for i, block in enumerate(self._recorded(key, parsed, profiler)):
+                if i >= served:
+                    yield block
+        finally:
+            package.close()
+
+    def _recorded(self, key: str, parsed: Iterator[Block], profiler: Profiler) -> Iterator[Block]:
+        with self.store(key, binary=True) as f:
+            record = []
+            for block in parsed:
+                record.append(block_to_data(block))
+                if len(record) == RECORD_BLOCKS:
+                    with profiler.stage("parse_cache"):
+                        marshal.dump(tuple(record), f)
+                    record.clear()
+                yield block
+            with profiler.stage("parse_cache"):
+                marshal.dump(tuple(record), f)
+                marshal.dump(None, f)  # the end record: an entry cut short never loads to the end
+
+    def __reduce__(self):
+        return open_parse_cache, (str(self.cache_dir), self.max_bytes)
+
+_open_caches: Dict[Tuple[str, int], ConversionCache] = {}
+_open_parse_caches: Dict[Tuple[str, int], ParseCache] = {}
+
+def open_cache(cache_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> ConversionCache:
+    """Per-process shared ConversionCache (keeps batch workers from rescanning the directory)."""
+    k = (str(cache_dir), max_bytes)
+    if k not in _open_caches:
+        _open_caches[k] = ConversionCache(Path(cache_dir), max_bytes)
+    return _open_caches[k]
+
+def open_parse_cache(cache_dir: Path, max_bytes: int = DEFAULT_PARSE_MAX_BYTES) -> ParseCache:
+    """Per-process shared ParseCache."""
+    k = (str(cache_dir), max_bytes)
+    if k not in _open_parse_caches:
+        _open_parse_caches[k] = ParseCache(Path(cache_dir), max_bytes)
+    return _open_parse_caches[k]
+
+def document_blocks(source: DocxSource, engine: str = "docx", profiler: Optional[Profiler] = None,
+                    parse_cache: Optional[ParseCache] = None) -> Tuple[Iterator[Block], ImagePart]:
+    """docx_ir.iter_document(), through *parse_cache* when one is given."""
+    if parse_cache is not None:
+        return parse_cache.document(source, engine, profiler)
+    return iter_document(source, engine, profiler)
+
+class _Tee:
+    def __init__(self, *streams: TextIO):
+        self.streams = streams
+
+    def write(self, s: str) -> None:
+        for stream in self.streams:
+            stream.write(s)
+
+def cached_convert_to_stream(convert_to_stream: ConvertToStream, docx_path: Path, fileobj: TextIO,
+                             cache: ConversionCache, fingerprint: str, engine: str = "docx",
+                             assets: Optional[AssetOptions] = None) -> bool:
+    """
+    Write the converted page for *docx_path* to *fileobj*, from the cache when possible.
+    On a miss the output is streamed to *fileobj* and the cache entry at the same time.
+    *assets* are the conversion's asset options: on a hit the document's images are
+    written there again (see docx_media.extract_images), as the page refers to them.
+    Returns True on a cache hit.
+    """
+    key = cache.key_for(docx_path, fingerprint)
+    hit = cache.lookup(key)
+    if hit is not None:
+        if assets is not None:
+            extract_images(docx_path, assets)
+        with open(hit, encoding="utf-8") as f:
+            shutil.copyfileobj(f, fileobj)
+        return True
+    with cache.store(key) as entry:
+        convert_to_stream(docx_path, _Tee(fileobj, entry), engine=engine)
+    return False
+
+def cached_convert(convert_to_stream: ConvertToStream, docx_path: Path, cache: ConversionCache,
+                   fingerprint: str, engine: str = "docx", assets: Optional[AssetOptions] = None) -> str:
+    """convert() with the cache in front of it."""
+    buf = io.StringIO()
+    cached_convert_to_stream(convert_to_stream, docx_path, buf, cache, fingerprint, engine, assets)
+    return buf.getvalue()
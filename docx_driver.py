@@ -0,0 +1,255 @@
+"""
+Conversion entry points and CLI shared by the DOCX → GCWeb HTML converters.
+
+Each converter module supplies what is its own: render_html() (IR blocks →
+page fragments), heading_level() and its mapping tables. A Converter wraps
+them with everything else: opening and parsing the document (through the
+parse cache), the convert/stream/async entry points, further render targets
+(docx_targets) and the command line with its batch, server, cache,
+profiling and incremental modes.
+
+  CONVERTER = Converter("docx_to_gcweb_html", __name__, __version__, render_html, heading_level,
+                        lambda: (STYLE_MAP, TABLE_STYLE_TO_CLASS))
+  convert = CONVERTER.convert
+
+A Converter pickles as a reference to its module's CONVERTER, so its bound
+methods (e.g. a functools.partial of convert_to_stream with the output
+options) can be sent to batch and server workers.
+"""
+
+from __future__ import annotations
+import argparse
+import contextlib
+import functools
+import importlib
+import io
+import sys
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
+
+from docx_async import shared_async_converter
+from docx_batch import add_batch_arguments, run_batch
+from docx_cache import (ConversionCache, ParseCache, add_cache_arguments, cached_convert_to_stream,
+                        document_blocks, mapping_fingerprint, open_parse_cache)
+from docx_incremental import BlockMemo
+from docx_ir import Block, gc_paused
+from docx_media import AssetOptions, ImagePart, add_media_arguments, asset_options
+from docx_profile import NULL_PROFILER, Profiler, add_profile_arguments, profiling, profiling_requested
+from docx_reader import ENGINES, DocxSource
+from docx_server import add_server_arguments, parse_address, run_server
+from docx_targets import Target, add_target_arguments, requested_targets, target_renderer, write_targets
+
+# render_html(blocks, image_part, block_memo, profiler, table_page_rows, assets) → page fragments
+RenderHtml = Callable[[Iterable[Block], Optional[ImagePart], Optional[BlockMemo], Optional[Profiler],
+                       Optional[int], Optional[AssetOptions]], Iterator[str]]
+
+def _module_converter(module: str) -> "Converter":
+    return importlib.import_module(module).CONVERTER
+
+class Converter:
+    """One converter's entry points, built from its render_html(), heading_level() and mapping tables."""
+
+    def __init__(self, name: str, module: str, version: str, render_html: RenderHtml,
+                 heading_level: Callable[[str], Optional[int]], mapping_tables: Callable[[], Tuple[dict, ...]]):
+        self.name = name                      # identifies the converter in cache fingerprints
+        self.module = module                  # the module whose CONVERTER this is
+        self.version = version
+        self.render_html = render_html
+        self.heading_level = heading_level
+        self.mapping_tables = mapping_tables  # read on every fingerprint, so edits to the tables count
+
+    def __reduce__(self):
+        return _module_converter, (self.module,)
+
+    def iter_html(self, docx_path: DocxSource, engine: str = "docx",
+                  block_memo: Optional[BlockMemo] = None,
+                  profiler: Optional[Profiler] = None,
+                  table_page_rows: Optional[int] = None,
+                  assets: Optional[AssetOptions] = None,
+                  parse_cache: Optional[ParseCache] = None) -> Iterator[str]:
+        """
+        Yield the page's HTML fragments in output order (convert() joins them with newlines).
+        *docx_path* may also be the .docx bytes (bytes/memoryview) or a binary file object.
+        Each block is parsed into the IR (docx_ir) and rendered by render_html() as it is read.
+        Fragments are handed over as soon as the block that produced them is finished,
+        so only one block's worth of output is held in memory at a time (big tables
+        are handed over in chunks of rows).
+        With *table_page_rows*, tables with more body rows than that are split into
+        pages linked by GCWeb pagination (see docx_html.iter_table_html).
+        With *assets*, inline images are extracted there and emitted as <img> (see docx_media).
+        With *block_memo*, blocks unchanged since the memo was recorded are replayed
+        instead of re-rendered (see docx_incremental).
+        With *parse_cache*, a document parsed before is rendered from its cached
+        IR (see docx_cache.ParseCache); the output is the same.
+        With *profiler*, each stage and block is timed (see docx_profile).
+        """
+        blocks, image_part = document_blocks(docx_path, engine, profiler, parse_cache)
+        yield from self.render_html(blocks, image_part, block_memo, profiler, table_page_rows, assets)
+
+    def cache_fingerprint(self, table_page_rows: Optional[int] = None,
+                          assets: Optional[AssetOptions] = None) -> str:
+        """Identifies this converter's mapping tables, version and output options for docx_cache."""
+        chosen = {"table_page_rows": table_page_rows, "assets": tuple(assets) if assets else None}
+        options = [{k: v for k, v in chosen.items() if v}] if any(chosen.values()) else []
+        return mapping_fingerprint(self.name, self.version, *self.mapping_tables(), *options)
+
+    def convert(self, docx_path: DocxSource, engine: str = "docx", block_memo: Optional[BlockMemo] = None,
+                profiler: Optional[Profiler] = None, table_page_rows: Optional[int] = None,
+                assets: Optional[AssetOptions] = None, parse_cache: Optional[ParseCache] = None,
+                renderers: Optional[Sequence[Target]] = None) -> Union[str, List[str]]:
+        """
+        The converted page. With *renderers* ("html", "text", "outline" or
+        docx_targets.Renderer functions), the list of their outputs instead, in
+        order, all rendered from a single parse of the document.
+        """
+        if renderers is None:
+            return "\n".join(self.iter_html(docx_path, engine, block_memo, profiler, table_page_rows, assets,
+                                            parse_cache))
+        buffers = [io.StringIO() for _ in renderers]
+        self.convert_to_streams(docx_path, buffers, renderers, engine, block_memo, profiler, table_page_rows,
+                                assets, parse_cache)
+        return [buf.getvalue() for buf in buffers]
+
+    def convert_to_stream(self, docx_path: DocxSource, fileobj: TextIO, engine: str = "docx",
+                          block_memo: Optional[BlockMemo] = None,
+                          profiler: Optional[Profiler] = None,
+                          table_page_rows: Optional[int] = None,
+                          assets: Optional[AssetOptions] = None,
+                          parse_cache: Optional[ParseCache] = None,
+                          targets: Optional[Sequence[Tuple[Target, TextIO]]] = None) -> None:
+        """
+        Write the converted page to the text stream *fileobj* block by block.
+        The text written is identical to convert(docx_path).
+        With *targets*, each (target, stream) pair also gets that rendering of the
+        document (see docx_targets), from the same parse.
+        """
+        if targets:
+            self.convert_to_streams(docx_path, [fileobj] + [f for _, f in targets],
+                                    ["html"] + [t for t, _ in targets],
+                                    engine, block_memo, profiler, table_page_rows, assets, parse_cache)
+            return
+        profiler = profiler or NULL_PROFILER
+        sep = ""
+        for fragment in self.iter_html(docx_path, engine, block_memo, profiler, table_page_rows, assets,
+                                       parse_cache):
+            with profiler.stage("write"):
+                fileobj.write(sep)
+                fileobj.write(fragment)
+            sep = "\n"
+
+    def convert_to_streams(self, docx_path: DocxSource, fileobjs: Sequence[TextIO], renderers: Sequence[Target],
+                           engine: str = "docx", block_memo: Optional[BlockMemo] = None,
+                           profiler: Optional[Profiler] = None,
+                           table_page_rows: Optional[int] = None,
+                           assets: Optional[AssetOptions] = None,
+                           parse_cache: Optional[ParseCache] = None) -> None:
+        """
+        Parse the document once and write the output of each of *renderers* to
+        the text stream at the same position of *fileobjs* (see
+        docx_targets.write_targets). "html" is this converter's page, with the
+        page options given here.
+        """
+        html_renderer = functools.partial(self.render_html, block_memo=block_memo, profiler=profiler,
+                                          table_page_rows=table_page_rows, assets=assets)
+        chosen = [target_renderer(target, html_renderer, self.heading_level) for target in renderers]
+        if not chosen:
+            raise ValueError("no renderers given (expected at least one render target)")
+        blocks, image_part = document_blocks(docx_path, engine, profiler, parse_cache)
+        write_targets(blocks, image_part, chosen, fileobjs, profiler)
+
+    def convert_async(self, source, engine: str = "docx") -> AsyncIterator[str]:
+        """
+        convert() for asyncio code: an async iterator of HTML chunks that does not block
+        the event loop. *source* is a path, the .docx bytes or an async stream (see docx_async).
+        """
+        return shared_async_converter(self.convert_to_stream).convert(source, engine)
+
+    def main(self) -> None:
+        ap = argparse.ArgumentParser()
+        ap.add_argument("input", nargs="?", help="Path to input .docx")
+        ap.add_argument("-o", "--output", help="Output HTML file path. If omitted, prints to stdout.")
+        ap.add_argument("--engine", choices=ENGINES, default="docx",
+                        help="DOCX reader: 'docx' loads the whole document (default), "
+                             "'stream' parses it block by block with flat memory use.")
+        add_batch_arguments(ap)
+        add_cache_arguments(ap)
+        add_profile_arguments(ap)
+        add_server_arguments(ap)
+        add_media_arguments(ap)
+        add_target_arguments(ap)
+        ap.add_argument("--incremental", metavar="MEMO",
+                        help="Block memo file (JSON). Blocks unchanged since the last run with the "
+                             "same memo reuse their HTML; the memo is rewritten after each run.")
+        ap.add_argument("--table-page-rows", type=int, metavar="N",
+                        help="Split tables with more than N body rows into pages of N rows, "
+                             "linked by GCWeb pagination.")
+        args = ap.parse_args()
+
+        # Output options ride along with the converter function (workers receive it pickled)
+        # Image URLs are relative to where the pages are written
+        if args.batch:
+            page_dir = Path(args.out_dir) if args.out_dir else None
+        else:
+            page_dir = Path(args.output).parent if args.output else None
+        assets = asset_options(args.assets_dir, args.assets_url, page_dir)
+        parse_cache = open_parse_cache(args.parse_cache, args.parse_cache_max_mb * 2**20) if args.parse_cache else None
+        options = {"table_page_rows": args.table_page_rows, "assets": assets, "parse_cache": parse_cache}
+        options = {k: v for k, v in options.items() if v}
+        to_stream = functools.partial(self.convert_to_stream, **options) if options else self.convert_to_stream
+        fingerprint = self.cache_fingerprint(args.table_page_rows, assets)
+        targets = requested_targets(args)
+        if targets and (args.batch or args.serve):
+            ap.error("--text-output/--outline-output work on a single input, not with --batch or --serve")
+        if targets and args.cache_dir:
+            ap.error("--text-output/--outline-output cannot be combined with --cache-dir "
+                     "(the cache holds pages only)")
+        if args.incremental and args.cache_dir:
+            ap.error("--incremental cannot be combined with --cache-dir (a cached page skips the memo)")
+        for flag, requested in (("--profile", profiling_requested(args)), ("--incremental", args.incremental)):
+            if requested and (args.batch or args.serve):
+                ap.error(f"{flag} works on a single input, not with {'--batch' if args.batch else '--serve'}")
+
+        if args.batch:
+            if not args.out_dir:
+                ap.error("--batch requires --out-dir")
+            failures = run_batch(to_stream, Path(args.batch), Path(args.out_dir),
+                                 jobs=args.jobs, engine=args.engine,
+                                 cache_dir=Path(args.cache_dir) if args.cache_dir else None,
+                                 cache_max_bytes=args.cache_max_mb * 2**20,
+                                 fingerprint=fingerprint, assets=assets)
+            sys.exit(1 if failures else 0)
+        if args.serve:
+            run_server(to_stream, parse_address(args.serve), jobs=args.jobs, engine=args.engine,
+                       max_upload_bytes=args.max_upload_mb * 2**20)
+            return
+        if not args.input:
+            ap.error("the following arguments are required: input (or --batch DIR / --serve PORT)")
+
+        def write_page(fileobj, profiler, extra):
+            if args.incremental:
+                memo = BlockMemo.load(Path(args.incremental), fingerprint)
+                to_stream(Path(args.input), fileobj, engine=args.engine, block_memo=memo,
+                          profiler=profiler, **extra)
+                memo.save(Path(args.incremental))
+                print(f"incremental: {memo.reused} blocks reused, {memo.rendered} re-rendered",
+                      file=sys.stderr)
+            elif args.cache_dir and profiler is None:
+                cache = ConversionCache(Path(args.cache_dir), args.cache_max_mb * 2**20)
+                cached_convert_to_stream(to_stream, Path(args.input), fileobj, cache,
+                                         fingerprint, engine=args.engine, assets=assets)
+            else:
+                to_stream(Path(args.input), fileobj, engine=args.engine, profiler=profiler, **extra)
+
+        # This process is ours: no collections while the document's records pile up
+        with gc_paused(), profiling(args) as profiler, contextlib.ExitStack() as outputs:
+            # --text-output/--outline-output are rendered from the page's parse
+            extra = {}
+            if targets:
+                extra["targets"] = [(target, outputs.enter_context(open(path, "w", encoding="utf-8")))
+                                    for target, path in targets]
+            if args.output:
+                with open(args.output, "w", encoding="utf-8") as f:
+                    write_page(f, profiler, extra)
+            else:
+                write_page(sys.stdout, profiler, extra)
+                sys.stdout.write("\n")
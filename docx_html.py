@@ -0,0 +1,301 @@
+"""
+HTML rendering helpers shared by the DOCX → GCWeb HTML converters.
+
+These render the block IR (docx_ir): runs, paragraphs' inline content and
+tables, never WordprocessingML elements or python-docx proxies (the
+functions that used to take those still do, and parse them first). Tables
+are rendered from their rows and cells with colspan/rowspan, and cell
+content goes through the same run rendering as body paragraphs.
+
+Big tables are rendered as a sequence of row chunks (iter_table_html), and can
+be split into several tables of at most *page_rows* body rows each, linked by
+GCWeb pagination.
+"""
+
+from __future__ import annotations
+import html
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from docx_ir import BOLD, ITALIC, PLAIN_PARSER, UNDERLINE, Cell, Image, Paragraph, Run, Table
+
+# <img> markup for a picture ("" to leave it out); supplied by the converter (see docx_media)
+ImageHtml = Callable[[Image], str]
+
+def esc(s: str) -> str:
+    return html.escape(s, quote=True)
+
+def _inline_html(text: str, flags: int, images: str) -> str:
+    if not text:
+        return images
+    frag = esc(text).replace("\n", "<br/>")
+    if flags:
+        if flags & BOLD:
+            frag = f"<strong>{frag}</strong>"
+        if flags & ITALIC:
+            frag = f"<em>{frag}</em>"
+        if flags & UNDERLINE:
+            frag = f"<u>{frag}</u>"
+    return frag + images if images else frag
+
+def run_to_html(run: Run, img_html: Optional[ImageHtml] = None) -> str:
+    """
+    One run as inline HTML: its text with bold/italic/underline, line breaks
+    as <br/>, and with *img_html* its pictures after the text.
+    """
+    images = "".join(map(img_html, run.images)) if img_html is not None and run.images else ""
+    return _inline_html(run.text, run.flags, images)
+
+def runs_to_html(paragraph, img_html: Optional[ImageHtml] = None) -> str:
+    """
+    A paragraph's runs as basic inline HTML (bold/italic/underline, and
+    pictures with *img_html*). Takes an IR Paragraph, or a python-docx
+    Paragraph / <w:p> element, which is parsed first.
+    """
+    if not isinstance(paragraph, Paragraph):
+        paragraph = PLAIN_PARSER.paragraph(getattr(paragraph, "_p", paragraph))
+    flags = paragraph.flags
+    if len(flags) == 1 and (img_html is None or not paragraph.images):  # the common case
+        return _inline_html(paragraph.texts[0], flags[0], "") or esc(paragraph.text)
+    if img_html is None or not paragraph.images:
+        parts = [_inline_html(text, flags[i], "") for i, text in enumerate(paragraph.texts) if text]
+    else:
+        images = paragraph.images
+        parts = [frag for frag in (_inline_html(text, flags[i], "".join(map(img_html, images[i])))
+                                   for i, text in enumerate(paragraph.texts)) if frag]
+    # If there were no (non-empty) runs, fall back to the paragraph text (e.g. hyperlinks only)
+    if not parts:
+        return esc(paragraph.text)
+    return "".join(parts)
+
+# ---------------- Lists ----------------
+class ListStack:
+    """
+    Nested <ul>/<ol> built from list paragraphs and their levels (w:ilvl).
+
+    A nested list belongs inside its parent's <li>, so each item's markup is
+    held back (pending) until the next item shows whether a deeper level
+    follows; items without children come out as <li>...</li>, as in a flat
+    list. An item costs O(lists opened or closed), so even long outlines are
+    built in linear time.
+    """
+    __slots__ = ("kinds", "pending")
+
+    def __init__(self):
+        self.kinds: List[str] = []           # open lists, outermost first
+        self.pending: Optional[str] = None   # inline HTML of the last item, not emitted yet
+
+    def __bool__(self) -> bool:
+        return bool(self.kinds)
+
+    def item(self, kind: str, level: int, text_html: str, out: List[str]) -> None:
+        """Add a list item of *kind* at *level* (0 = outermost), appending markup to *out*."""
+        # A list can only nest one level below the item it belongs to
+        target = min(level, len(self.kinds)) + 1
+        if self.pending is not None:
+            if target > len(self.kinds):
+                out.append(f"<li>{self.pending}")  # the nested list opens inside this item
+            else:
+                out.append(f"<li>{self.pending}</li>")
+            self.pending = None
+        while len(self.kinds) > target:
+            out.append(f"</{self.kinds.pop()}>")
+            out.append("</li>")
+        if len(self.kinds) == target and self.kinds[-1] != kind:
+            out.append(f"</{self.kinds.pop()}>")
+        if len(self.kinds) < target:
+            self.kinds.append(kind)
+            out.append(f"<{kind}>")
+        self.pending = text_html
+
+    def close(self, out: List[str]) -> None:
+        """Emit the pending item and close every open list."""
+        if self.pending is not None:
+            out.append(f"<li>{self.pending}</li>")
+            self.pending = None
+        while self.kinds:
+            out.append(f"</{self.kinds.pop()}>")
+            if self.kinds:
+                out.append("</li>")
+
+    def snapshot(self) -> Tuple[Tuple[str, ...], Optional[str]]:
+        return tuple(self.kinds), self.pending
+
+    def restore(self, saved: Tuple[Tuple[str, ...], Optional[str]]) -> None:
+        kinds, self.pending = saved
+        self.kinds = list(kinds)
+
+# ---------------- Tables ----------------
+# Body rows per fragment when a table is rendered in pieces
+TABLE_CHUNK_ROWS = 500
+
+def _as_table(table) -> Table:
+    """An IR Table as is; a python-docx Table or <w:tbl> parsed (no list resolution in its cells)."""
+    if isinstance(table, Table):
+        return table
+    return PLAIN_PARSER.table(getattr(table, "_tbl", table))
+
+def table_spans(table: Table, page_rows: Optional[int] = None) -> Dict[Tuple[int, int], Tuple[int, int]]:
+    """
+    (colspan, rowspan) of the merged cells of a table, keyed by (row, cell
+    index), from the cells' gridSpan/vMerge alone. rowspan 0 marks the
+    continuation of a vertically merged cell above, which is not emitted.
+    Unmerged cells are left out (1, 1), so this stays small for big tables, and
+    a table without any merge is not walked at all. A rowspan cannot cross
+    <thead>/<tbody> or a page boundary (every *page_rows* body rows), so merges stop there.
+    """
+    spans: Dict[Tuple[int, int], Tuple[int, int]] = {}
+    if not table.layout:
+        return spans
+    above: Dict[int, Tuple[int, int]] = {}  # grid column -> cell covering it in the previous row
+    for r, row in enumerate(table.layout):
+        current: Dict[int, Tuple[int, int]] = {}
+        col = table.grid_before[r] if table.grid_before else 0
+        for i, (span, vmerge) in enumerate(row):
+            origin = above.get(col) if vmerge == "continue" else None
+            if origin is not None:
+                o_span, o_rows = spans.get(origin, (1, 1))
+                spans[origin] = (o_span, o_rows + 1)
+                spans[(r, i)] = (span, 0)
+            else:
+                origin = (r, i)
+                if span > 1:
+                    spans[origin] = (span, 1)
+            for c in range(col, col + span):
+                current[c] = origin
+            col += span
+        at_boundary = r == 0 or (page_rows and r % page_rows == 0)
+        above = {} if at_boundary else current
+    return spans
+
+def cell_html(cell: Cell, img_html: Optional[ImageHtml] = None) -> str:
+    """
+    Content of a table cell, rendered with the same inline rendering as body
+    text. A lone paragraph is inlined; several become <p>s, with list
+    paragraphs built into nested <ul>/<ol>. Empty paragraphs are dropped and
+    nested tables rendered in place.
+    """
+    if len(cell) == 1 and isinstance(cell[0], Paragraph) and not cell[0].list_item:
+        return runs_to_html(cell[0], img_html).strip()
+    blocks: List[str] = []
+    lists = ListStack()
+    lone: Optional[str] = None  # inline HTML of a plain paragraph, while it is the only block
+    for block in cell:
+        if isinstance(block, Table):
+            lists.close(blocks)
+            blocks.append(table_to_html(block, "table", img_html=img_html))
+            continue
+        text_html = runs_to_html(block, img_html)
+        if not text_html.strip():
+            continue
+        item = block.list_item
+        lone = None if blocks or lists or item else text_html
+        if item:
+            lists.item(item[0], item[1], text_html, blocks)
+        else:
+            lists.close(blocks)
+            blocks.append(f"<p>{text_html}</p>")
+    lists.close(blocks)
+    if lone is not None and len(blocks) == 1:
+        return lone.strip()
+    return "".join(blocks)
+
+def _cell_html(tag: str, attrs: str, content: str, colspan: int, rowspan: int) -> str:
+    if colspan > 1:
+        attrs += f" colspan='{colspan}'"
+    if rowspan > 1:
+        attrs += f" rowspan='{rowspan}'"
+    return f"<{tag}{attrs}>{content}</{tag}>"
+
+def _row_html(cells: Tuple[Cell, ...], r: int, before: int, spans: Dict[Tuple[int, int], Tuple[int, int]],
+              tag: str, attrs: str, img_html: Optional[ImageHtml]) -> str:
+    parts: List[str] = []
+    if before:
+        # Empty grid columns ahead of the row's first cell keep the columns aligned
+        parts.append(_cell_html(tag, attrs, "", before, 1))
+    for i, cell in enumerate(cells):
+        colspan, rowspan = spans.get((r, i), (1, 1)) if spans else (1, 1)
+        if rowspan:
+            parts.append(_cell_html(tag, attrs, cell_html(cell, img_html), colspan, rowspan))
+    return "<tr>" + "".join(parts) + "</tr>"
+
+def _pagination_html(table_id: str, page: int, pages: int) -> str:
+    """GCWeb pagination (as emitted for the WET Pagination styles) linking the pages of a split table."""
+    def href(n: int) -> str:
+        return f"#{table_id}-page-{n}"
+
+    items = ["<li class='disabled'><span>Previous</span></li>" if page == 1
+             else f"<li><a href='{href(page - 1)}' rel='prev'>Previous</a></li>"]
+    for n in range(1, pages + 1):
+        if n == page:
+            items.append(f"<li class='active'><a href='{href(n)}' aria-current='page'>{n}</a></li>")
+        else:
+            items.append(f"<li><a href='{href(n)}'>{n}</a></li>")
+    items.append("<li class='disabled'><span>Next</span></li>" if page == pages
+                 else f"<li><a href='{href(page + 1)}' rel='next'>Next</a></li>")
+    return "<nav aria-label='Pagination'><ul class='pagination'>" + "".join(items) + "</ul></nav>"
+
+def table_is_paged(table, page_rows: Optional[int]) -> bool:
+    """Whether iter_table_html() splits this table into pages."""
+    if not page_rows:
+        return False
+    return len(_as_table(table).rows) - 1 > page_rows
+
+def iter_table_html(table, table_classes: str, page_rows: Optional[int] = None,
+                    table_id: str = "table", img_html: Optional[ImageHtml] = None) -> Iterator[str]:
+    """
+    Render an IR Table (or a python-docx Table / <w:tbl>, parsed first) as HTML
+    fragments to be joined with newlines, first row as the header. Each cell is
+    visited once; merged cells become colspan/rowspan, and cell content is
+    rendered by cell_html() (with *img_html* rendering pictures).
+
+    A table of up to TABLE_CHUNK_ROWS body rows is one fragment; a bigger one
+    comes as chunks of rows, so it never has to be held as one string. With
+    *page_rows*, a table with more body rows than that is split into pages of
+    *page_rows* rows, each with the header repeated, wrapped in
+    <div id='{table_id}-page-N'> and followed by pagination linking the pages.
+    """
+    table = _as_table(table)
+    rows = table.rows
+    if not rows:
+        yield ""
+        return
+    before = table.grid_before or (0,) * len(rows)
+    body_rows = len(rows) - 1
+    paged = bool(page_rows) and body_rows > page_rows
+    spans = table_spans(table, page_rows if paged else None)
+    head = _row_html(rows[0], 0, before[0], spans, "th", " scope='col'", img_html)
+    open_table = f"<table class='{esc(table_classes)}'><thead>{head}</thead><tbody>"
+
+    page_size = page_rows if paged else max(body_rows, 1)
+    pages = -(-body_rows // page_size) if body_rows else 1
+    for page in range(1, pages + 1):
+        start = 1 + (page - 1) * page_size
+        end = min(start + page_size, len(rows))
+        parts = [f"<div id='{table_id}-page-{page}'>{open_table}" if paged else open_table]
+        for r in range(start, end):
+            parts.append(_row_html(rows[r], r, before[r], spans, "td", "", img_html))
+            if len(parts) > TABLE_CHUNK_ROWS:
+                yield "".join(parts)
+                parts = []
+        parts.append("</tbody></table>")
+        if paged:
+            parts.append(_pagination_html(table_id, page, pages) + "</div>")
+        yield "".join(parts)
+
+def table_to_html(table, table_classes: str, page_rows: Optional[int] = None,
+                  table_id: str = "table", img_html: Optional[ImageHtml] = None) -> str:
+    """The whole of iter_table_html() as one string."""
+    return "\n".join(iter_table_html(table, table_classes, page_rows, table_id, img_html))
+
+def wrap_fragments(fragments: Iterator[str], before: str, after: str) -> Iterator[str]:
+    """Yield *fragments* with *before* prepended to the first and *after* appended to the last."""
+    pending = before
+    first = True
+    for fragment in fragments:
+        if first:
+            pending += fragment
+            first = False
+        else:
+            yield pending
+            pending = fragment
+    yield pending + after
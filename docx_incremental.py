@@ -0,0 +1,104 @@
+"""
+Block-level incremental reconversion for the DOCX → GCWeb HTML converters.
+
+A BlockMemo remembers, for every body block converted last time, the HTML
+fragments it produced. The key is the digest of the block's IR (docx_ir:
+style name, list kind and level, runs, cells, ...) and the converter state it
+started in: open list, pending table marker, details/accordion/pagination
+state, ... On the next run an unchanged block that starts in the same state
+replays its fragments and end state instead of being re-rendered.
+
+Because the entry state is part of the key, edits that change how later
+blocks are wrapped (e.g. removing a "WET Accordion End" marker) re-render
+exactly the blocks that are affected, and nothing else.
+
+The IR already holds what a block takes from the rest of the document (its
+style name, and its list kind as numbering.xml defines it), so a change there
+changes the key of exactly the blocks it affects.
+
+Blocks that show pictures are never memoized: the IR names a picture by its
+relationship id only, which Word reuses for other images when it saves, and
+a replay would skip writing the image to the asset directory.
+
+The memo is saved as JSON next to the output and holds only the blocks seen
+in the latest run, so it never grows beyond one document's worth.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from docx_ir import has_images
+
+MEMO_FORMAT = 2
+
+State = Tuple[Any, ...]
+MemoKey = Tuple[str, State]
+
+def _freeze(value: Any) -> Any:
+    """JSON turns state tuples into lists; turn them back (recursively) so keys are hashable."""
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+class BlockMemo:
+    """Fragments and end state per (block IR digest, entry state)."""
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self._previous: Dict[MemoKey, Tuple[List[str], State]] = {}
+        self._current: Dict[MemoKey, Tuple[List[str], State]] = {}
+        self.reused = 0
+        self.rendered = 0
+
+    @staticmethod
+    def key(block, state: State) -> Optional[MemoKey]:
+        """
+        Key of a docx_ir block entered in *state* (the records' repr spells out
+        every field), or None for a block with pictures, which is always rendered.
+        """
+        if has_images(block):
+            return None
+        return hashlib.sha1(repr(block).encode("utf-8")).hexdigest(), state
+
+    def get(self, key: Optional[MemoKey]) -> Optional[Tuple[List[str], State]]:
+        hit = (self._previous.get(key) or self._current.get(key)) if key is not None else None
+        if hit is None:
+            self.rendered += 1
+            return None
+        self.reused += 1
+        self._current[key] = hit
+        return hit
+
+    def put(self, key: MemoKey, fragments: List[str], state_after: State) -> None:
+        self._current[key] = (list(fragments), state_after)
+
+    @classmethod
+    def load(cls, path: Path, fingerprint: str) -> "BlockMemo":
+        """Load a saved memo; a missing, unreadable or stale (other converter/mapping) file starts empty."""
+        memo = cls(fingerprint)
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return memo
+        if data.get("format") != MEMO_FORMAT or data.get("fingerprint") != fingerprint:
+            return memo
+        for digest, state, fragments, state_after in data["blocks"]:
+            memo._previous[(digest, _freeze(state))] = (fragments, _freeze(state_after))
+        return memo
+
+    def save(self, path: Path) -> None:
+        data = {
+            "format": MEMO_FORMAT,
+            "fingerprint": self.fingerprint,
+            "blocks": [
+                [digest, list(state), fragments, list(state_after)]
+                for (digest, state), (fragments, state_after) in self._current.items()
+            ],
+        }
+        tmp = Path(f"{path}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
@@ -0,0 +1,485 @@
+"""
+Block IR between DOCX parsing and rendering, shared by the DOCX → GCWeb HTML converters.
+
+Each body block the reader yields is parsed once into compact records, and
+the renderers (docx_html, the converters' render_html) work on those records
+only, never on WordprocessingML elements or python-docx proxies:
+
+  Paragraph(style, list_item, texts, flags, images, text)   Image(r_id, alt, width, height)
+  Table(rows, layout, grid_before)                          a cell is a tuple of blocks
+
+Everything that depends only on the document is resolved here: the
+paragraph's style name, its list kind and level (from numbering.xml or the
+built-in list styles), run text with its direct bold/italic/underline, the
+pictures a run shows, and each table cell's gridSpan/vMerge and content.
+What depends on the output is left to the renderer: style → tag/class mapping,
+merges as colspan/rowspan (a merge stops at a table page boundary), and image
+extraction.
+
+The records are NamedTuples: immutable, picklable and compared by value, so a
+parsed document (read_document) can be rendered several times or stored.
+What there are many of is array-backed instead of a record each: a
+paragraph's runs are parallel tuples (and bytes for their formatting), a
+table's rows are tuples of cells. Plain tuples of strings and numbers are
+dropped from the garbage collector's watch, NamedTuples never are, so a
+table of 300,000 cells costs two tracked objects per cell rather than five.
+Entry points that own their process (the CLI, batch and server workers) also
+hold off automatic collection while they convert (gc_paused()); parsing
+itself never touches the collector, so a host process keeps its own setting.
+
+  blocks = read_document("report.docx")
+  html = "\\n".join(docx_to_gcweb_html.render_html(blocks))
+"""
+
+from __future__ import annotations
+import contextlib
+import gc
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from docx.oxml.ns import qn
+
+from docx_profile import NULL_PROFILER, Profiler
+from docx_reader import (DocxSource, NumberingIndex, StyleTable, build_numbering_index, build_style_table,
+                         open_reader)
+
+W_R = qn("w:r")
+W_RPR = qn("w:rPr")
+W_T = qn("w:t")
+W_TAB = qn("w:tab")
+W_PTAB = qn("w:ptab")
+W_BR = qn("w:br")
+W_CR = qn("w:cr")
+W_NO_BREAK_HYPHEN = qn("w:noBreakHyphen")
+W_HYPERLINK = qn("w:hyperlink")
+W_DRAWING = qn("w:drawing")
+W_B = qn("w:b")
+W_I = qn("w:i")
+W_U = qn("w:u")
+W_VAL = qn("w:val")
+W_TYPE = qn("w:type")
+W_P = qn("w:p")
+W_PPR = qn("w:pPr")
+W_PSTYLE = qn("w:pStyle")
+W_NUMPR = qn("w:numPr")
+W_NUM_ID = qn("w:numId")
+W_ILVL = qn("w:ilvl")
+W_TBL = qn("w:tbl")
+W_TR = qn("w:tr")
+W_TRPR = qn("w:trPr")
+W_TC = qn("w:tc")
+W_TCPR = qn("w:tcPr")
+W_GRID_BEFORE = qn("w:gridBefore")
+W_GRID_SPAN = qn("w:gridSpan")
+W_VMERGE = qn("w:vMerge")
+WP_INLINE = qn("wp:inline")
+WP_ANCHOR = qn("wp:anchor")
+WP_EXTENT = qn("wp:extent")
+WP_DOC_PR = qn("wp:docPr")
+A_BLIP = qn("a:blip")
+R_EMBED = qn("r:embed")
+
+# Bump when the records or their plain-data form change (invalidates docx_cache.ParseCache entries)
+IR_FORMAT = 2
+
+EMU_PER_PX = 9525  # 914400 EMU per inch at 96 px per inch
+
+# Run.flags
+BOLD = 1
+ITALIC = 2
+UNDERLINE = 4
+
+# Run content elements other than <w:t>/<w:br> and their text equivalents (as in python-docx)
+_RUN_CHARS = {W_TAB: "\t", W_PTAB: "\t", W_CR: "\n", W_NO_BREAK_HYPHEN: "-"}
+
+# ---------------- Records ----------------
+class Image(NamedTuple):
+    """An embedded picture: the relationship id of its image part and its <img> attributes."""
+    r_id: str
+    alt: str
+    width: Optional[int]   # px, from <wp:extent>
+    height: Optional[int]
+
+class Run(NamedTuple):
+    """One run of a Paragraph (see Paragraph.runs())."""
+    text: str                        # tabs as \t, line breaks as \n
+    flags: int                       # BOLD | ITALIC | UNDERLINE
+    images: Tuple[Image, ...]
+
+class Paragraph(NamedTuple):
+    """A <w:p>; its runs that have text or pictures are stored as parallel arrays."""
+    style: str                                # paragraph style name ("" for none)
+    list_item: Optional[Tuple[str, int]]      # (list kind "ul"/"ol", level), None if not a list item
+    texts: Tuple[str, ...]                    # per run: its text
+    flags: bytes                              # per run: BOLD | ITALIC | UNDERLINE
+    images: Tuple[Tuple[Image, ...], ...]     # per run: its pictures; () if no run has any
+    text: str = ""                            # the paragraph's text when no run has any (hyperlinks only)
+
+    def runs(self) -> Iterator[Run]:
+        for i, text in enumerate(self.texts):
+            yield Run(text, self.flags[i], self.images[i] if self.images else ())
+
+# A table cell's content: its paragraphs and nested tables, in order
+Cell = Tuple[Union[Paragraph, "Table"], ...]
+
+class Table(NamedTuple):
+    """
+    A <w:tbl>: per row, its cells. *layout* has per row, per cell (gridSpan,
+    vMerge) with vMerge None, "restart" or "continue", and is () when no cell
+    spans or merges; *grid_before* has per row the empty grid columns ahead of
+    its first cell, and is () when there are none.
+    """
+    rows: Tuple[Tuple[Cell, ...], ...]
+    layout: Tuple[Tuple[Tuple[int, Optional[str]], ...], ...] = ()
+    grid_before: Tuple[int, ...] = ()
+
+Block = Union[Paragraph, Table]
+
+def has_images(block: Block) -> bool:
+    """Whether a block shows any picture, in its runs or in any of its (nested) table cells."""
+    if isinstance(block, Paragraph):
+        return bool(block.images)
+    return any(has_images(b) for row in block.rows for cell in row for b in cell)
+
+# rId -> (part name, bytes) of a part related to the main document part, or None
+ImagePart = Callable[[str], Optional[Tuple[str, bytes]]]
+
+# ---------------- Plain data ----------------
+# Blocks as nested tuples of str/int/bytes/None only (no record classes), for
+# data-only serializers such as marshal: paragraphs are tagged 0, tables 1.
+_PARAGRAPH, _TABLE = 0, 1
+
+def block_to_data(block: Block) -> tuple:
+    """A block as plain data (see block_from_data())."""
+    if isinstance(block, Paragraph):
+        images = tuple([tuple([tuple(image) for image in run]) for run in block.images])
+        return _PARAGRAPH, block.style, block.list_item, block.texts, block.flags, images, block.text
+    rows = tuple([tuple([tuple([block_to_data(b) for b in cell]) for cell in row]) for row in block.rows])
+    return _TABLE, rows, block.layout, block.grid_before
+
+def block_from_data(data: tuple) -> Block:
+    """The block block_to_data() made *data* from; malformed data raises TypeError or ValueError."""
+    if data[0] == _PARAGRAPH:
+        _, style, item, texts, flags, images, text = data
+        if images:
+            images = tuple([tuple([Image(*image) for image in run]) for run in images])
+        return Paragraph(style, item, texts, flags, images, text)
+    if data[0] == _TABLE:
+        _, rows, layout, before = data
+        rows = tuple([tuple([tuple([block_from_data(b) for b in cell]) for cell in row]) for row in rows])
+        return Table(rows, layout, before)
+    raise ValueError(f"not a block: tag {data[0]!r}")
+
+# ---------------- Element helpers ----------------
+def _int_val(el, default: int, minimum: int = 1) -> int:
+    try:
+        return max(minimum, int(el.get(W_VAL)))
+    except (TypeError, ValueError):
+        return default
+
+def _child(el, tag: str):
+    """First child of *el* with *tag*, or None (element.find() goes through ElementPath, ~10x slower)."""
+    for child in el.iterchildren(tag):
+        return child
+    return None
+
+def _on(el) -> bool:
+    """Value of an on/off property element such as <w:b/> or <w:i w:val="0"/>."""
+    val = el.get(W_VAL)
+    return val is None or val in ("1", "true", "on")
+
+def run_text(r) -> str:
+    """Text of a <w:r>: <w:t> text, tabs as \\t, line breaks as \\n (python-docx's Run.text)."""
+    chunks: List[str] = []
+    for child in r:
+        tag = child.tag
+        if tag == W_T:
+            chunks.append(child.text or "")
+        elif tag == W_BR:
+            # page and column breaks have no text equivalent
+            if child.get(W_TYPE, "textWrapping") == "textWrapping":
+                chunks.append("\n")
+        elif tag in _RUN_CHARS:
+            chunks.append(_RUN_CHARS[tag])
+    return "".join(chunks)
+
+def paragraph_text(p) -> str:
+    """Text of a <w:p>, including hyperlink text (python-docx's Paragraph.text)."""
+    chunks: List[str] = []
+    for child in p:
+        if child.tag == W_R:
+            chunks.append(run_text(child))
+        elif child.tag == W_HYPERLINK:
+            chunks.extend(run_text(r) for r in child.iterchildren(W_R))
+    return "".join(chunks)
+
+def cell_text(tc) -> str:
+    """Text of a <w:tc>: its paragraphs' text, one line each (python-docx's _Cell.text)."""
+    return "\n".join(paragraph_text(p) for p in tc.iterchildren(W_P))
+
+def paragraph_props(p) -> Tuple[Optional[str], Optional[Tuple[Optional[str], int]]]:
+    """
+    (styleId, numbering) of a <w:p>, read straight from its <w:pPr>; numbering
+    is (numId, ilvl) when the paragraph has <w:numPr>, else None. numId is None
+    when only the level is given (the style supplies the list).
+    """
+    pPr = _child(p, W_PPR)
+    if pPr is None:
+        return None, None
+    p_style = _child(pPr, W_PSTYLE)
+    style_id = p_style.get(W_VAL) if p_style is not None else None
+    num_pr = _child(pPr, W_NUMPR)
+    if num_pr is None:
+        return style_id, None
+    num_id = _child(num_pr, W_NUM_ID)
+    ilvl = _child(num_pr, W_ILVL)
+    return style_id, (num_id.get(W_VAL) if num_id is not None else None,
+                      _int_val(ilvl, 0, 0) if ilvl is not None else 0)
+
+def _emu_to_px(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(1, round(int(value) / EMU_PER_PX))
+    except (TypeError, ValueError):
+        return None
+
+def drawing_image(drawing) -> Optional[Image]:
+    """The picture of a <w:drawing> (inline or floating), or None if it embeds none."""
+    for shape in drawing.iterchildren(WP_INLINE, WP_ANCHOR):
+        blip = next(shape.iter(A_BLIP), None)
+        r_id = blip.get(R_EMBED) if blip is not None else None
+        if not r_id:
+            return None
+        doc_pr = _child(shape, WP_DOC_PR)
+        alt = (doc_pr.get("descr") or doc_pr.get("title") or "") if doc_pr is not None else ""
+        extent = _child(shape, WP_EXTENT)
+        if extent is None:
+            return Image(r_id, alt, None, None)
+        return Image(r_id, alt, _emu_to_px(extent.get("cx")), _emu_to_px(extent.get("cy")))
+    return None
+
+def parse_run(r) -> Run:
+    """
+    A <w:r> as a Run, reading its text, direct bold/italic/underline
+    formatting and pictures in a single pass over the run's children.
+    """
+    return Run(*_run_fields(r))
+
+def _run_fields(r) -> Tuple[str, int, Tuple[Image, ...]]:
+    chunks: List[str] = []
+    images: List[Image] = []
+    bold = italic = underline = None
+    for child in r:
+        tag = child.tag
+        if tag == W_T:
+            chunks.append(child.text or "")
+        elif tag == W_RPR:
+            for prop in child:
+                ptag = prop.tag
+                # the first occurrence wins, as in python-docx
+                if ptag == W_B:
+                    if bold is None:
+                        bold = _on(prop)
+                elif ptag == W_I:
+                    if italic is None:
+                        italic = _on(prop)
+                elif ptag == W_U:
+                    if underline is None:
+                        # <w:u/> without a style and <w:u w:val="none"/> mean "not underlined"
+                        underline = prop.get(W_VAL) not in (None, "none")
+        elif tag == W_BR:
+            if child.get(W_TYPE, "textWrapping") == "textWrapping":
+                chunks.append("\n")
+        elif tag in _RUN_CHARS:
+            chunks.append(_RUN_CHARS[tag])
+        elif tag == W_DRAWING:
+            image = drawing_image(child)
+            if image is not None:
+                images.append(image)
+    flags = (BOLD if bold else 0) | (ITALIC if italic else 0) | (UNDERLINE if underline else 0)
+    return "".join(chunks), flags, tuple(images)
+
+def tc_layout(tc) -> Tuple[int, Optional[str]]:
+    """(gridSpan, vMerge) of a <w:tc>; vMerge is None, "restart" or "continue"."""
+    span, vmerge = 1, None
+    tcPr = _child(tc, W_TCPR)
+    if tcPr is not None:
+        grid_span = _child(tcPr, W_GRID_SPAN)
+        if grid_span is not None:
+            span = _int_val(grid_span, 1)
+        v_merge = _child(tcPr, W_VMERGE)
+        if v_merge is not None:
+            vmerge = v_merge.get(W_VAL, "continue")  # <w:vMerge/> continues the cell above
+    return span, vmerge
+
+def grid_before(tr) -> int:
+    """Empty grid columns ahead of a <w:tr>'s first cell (<w:gridBefore>)."""
+    trPr = _child(tr, W_TRPR)
+    if trPr is None:
+        return 0
+    el = _child(trPr, W_GRID_BEFORE)
+    return _int_val(el, 0) if el is not None else 0
+
+# ---------------- Lists ----------------
+def style_list_kind(style_name: str) -> Optional[str]:
+    """List kind implied by the built-in "List Bullet" / "List Number" styles."""
+    if style_name.startswith("List Bullet"):
+        return "ul"
+    if style_name.startswith("List Number"):
+        return "ol"
+    return None
+
+def style_list_level(style_name: str) -> int:
+    """Nesting level (0 = outermost) implied by "List Bullet 2", "List Number 3", ..."""
+    tail = style_name.rsplit(" ", 1)[-1]
+    return int(tail) - 1 if tail.isdigit() and style_list_kind(style_name) else 0
+
+def list_kind_of(style_kind: Optional[str], num: Optional[Tuple[Optional[str], int]],
+                 numbering: Optional[NumberingIndex]) -> Optional[str]:
+    """
+    List kind of a paragraph from its style's kind and its direct numbering
+    (numId, ilvl) as given by paragraph_props(). Direct numbering is looked up
+    in the document's numbering index: a bullet level is "ul", any numbered
+    format "ol", and numId 0 switches numbering off. Without an index (or for
+    an undefined numId) the style decides, and other numbering defaults to "ul".
+    """
+    if num is not None and numbering is not None:
+        num_id, ilvl = num
+        if num_id == "0":
+            return None
+        kind = numbering.kind(num_id, ilvl)
+        if kind:
+            return kind
+    if style_kind:
+        return style_kind
+    return "ul" if num is not None else None
+
+def list_item_of(style, num: Optional[Tuple[Optional[str], int]],
+                 numbering: Optional[NumberingIndex]) -> Optional[Tuple[str, int]]:
+    """
+    (list kind, level) of a list paragraph, None for other paragraphs. *style*
+    has the style's list_kind and list_level (a ParagraphStyle or a converter's
+    StyleInfo). The level is the paragraph's w:ilvl, or the one its style
+    implies ("List Bullet 2" → 1).
+    """
+    kind = list_kind_of(style.list_kind, num, numbering)
+    if kind is None:
+        return None
+    return kind, num[1] if num is not None else style.list_level
+
+# ---------------- Parser ----------------
+@contextlib.contextmanager
+def gc_paused() -> Iterator[None]:
+    """
+    Hold off automatic garbage collection while a conversion's records pile
+    up: every collection would rescan all of them, though none is garbage.
+    This switches the collector off for the whole process, so only entry
+    points that own their process use it (the CLI and the batch and server
+    workers), never code that may run inside someone else's.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+class ParagraphStyle(NamedTuple):
+    """What parsing needs to know about a paragraph style."""
+    name: str
+    list_kind: Optional[str]
+    list_level: int
+
+def paragraph_style(style_name: str) -> ParagraphStyle:
+    return ParagraphStyle(style_name, style_list_kind(style_name), style_list_level(style_name))
+
+class BlockParser:
+    """
+    Parses one document's blocks into the IR, with its paragraph styles and
+    numbering definitions resolved once. Without a styles part, paragraphs
+    have no style name; without either part, direct numbering is not resolved
+    (lists=False leaves list_item None throughout).
+    """
+
+    def __init__(self, styles_element=None, numbering_element=None, lists: bool = True):
+        self.styles: StyleTable[ParagraphStyle] = build_style_table(styles_element, paragraph_style)
+        self.numbering = build_numbering_index(numbering_element, styles_element)
+        self.lists = lists
+
+    def paragraph(self, p) -> Paragraph:
+        style_id, num = paragraph_props(p)
+        style = self.styles.lookup(style_id)
+        if self.lists and (num is not None or style.list_kind):
+            item = list_item_of(style, num, self.numbering)
+        else:
+            item = None
+        runs = [fields for fields in map(_run_fields, p.iterchildren(W_R)) if fields[0] or fields[2]]
+        # Without text in any run, fall back to the paragraph text (e.g. hyperlinks only)
+        if not runs:
+            return Paragraph(style.name, item, (), b"", (), paragraph_text(p))
+        if len(runs) == 1:  # the common case
+            text, run_flags, run_images = runs[0]
+            return Paragraph(style.name, item, (text,), bytes((run_flags,)), (run_images,) if run_images else (),
+                             "" if text else paragraph_text(p))
+        texts, flags, images = zip(*runs)
+        return Paragraph(style.name, item, texts, bytes(flags), images if any(images) else (),
+                         "" if any(texts) else paragraph_text(p))
+
+    def cell(self, tc) -> Cell:
+        return tuple([self.paragraph(child) if child.tag == W_P else self.table(child)
+                      for child in tc.iterchildren(W_P, W_TBL)])
+
+    def table(self, tbl) -> Table:
+        # Most tables have no merged cells and no gridBefore at all; look for them once
+        merged = next(tbl.iter(W_GRID_SPAN, W_VMERGE), None) is not None
+        grid = next(tbl.iter(W_GRID_BEFORE), None) is not None
+        cell = self.cell
+        rows: List[Tuple[Cell, ...]] = []
+        layout: List[Tuple[Tuple[int, Optional[str]], ...]] = []
+        before: List[int] = []
+        for tr in tbl.iterchildren(W_TR):
+            tcs = list(tr.iterchildren(W_TC))
+            rows.append(tuple([cell(tc) for tc in tcs]))
+            if merged:
+                layout.append(tuple([tc_layout(tc) for tc in tcs]))
+            if grid:
+                before.append(grid_before(tr))
+        return Table(tuple(rows), tuple(layout), tuple(before))
+
+    def parse(self, block) -> Block:
+        """The IR of a body block: a python-docx Paragraph/Table or a <w:p>/<w:tbl> element."""
+        element = getattr(block, "_element", block)
+        return self.paragraph(element) if element.tag == W_P else self.table(element)
+
+    def iter_blocks(self, blocks: Iterable, profiler: Optional[Profiler] = None) -> Iterator[Block]:
+        """Parse a reader's blocks as they come, timing the work as the "parse" stage."""
+        profiler = profiler or NULL_PROFILER
+        for block in blocks:
+            with profiler.stage("parse"):
+                parsed = self.parse(block)
+            yield parsed
+
+# Parser for elements handed over without their document (no styles, no list resolution)
+PLAIN_PARSER = BlockParser(lists=False)
+
+def parser_for(reader) -> BlockParser:
+    """BlockParser for the document an open reader (docx_reader.open_reader) reads."""
+    return BlockParser(reader.styles, reader.numbering)
+
+def iter_document(docx_path: DocxSource, engine: str = "docx",
+                  profiler: Optional[Profiler] = None) -> Tuple[Iterator[Block], ImagePart]:
+    """
+    Open *docx_path* and parse its blocks as they are read: (IR blocks,
+    image_part), where image_part(rId) reads a picture's part while the blocks
+    are being consumed.
+    """
+    profiler = profiler or NULL_PROFILER
+    with profiler.stage("open"):
+        reader = open_reader(docx_path, engine, profiler)
+    with profiler.stage("styles"):
+        parser = parser_for(reader)
+    return parser.iter_blocks(profiler.iterate("read", reader.blocks()), profiler), reader.image_part
+
+def read_document(docx_path: DocxSource, engine: str = "docx",
+                  profiler: Optional[Profiler] = None) -> List[Block]:
+    """Parse a whole document into its list of IR blocks (pictures are referenced, not read)."""
+    return list(iter_document(docx_path, engine, profiler)[0])
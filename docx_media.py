@@ -0,0 +1,167 @@
+"""
+Inline image extraction for the DOCX → GCWeb HTML converters.
+
+A <w:drawing> (inline or floating picture) becomes an <img> whose width and
+height come from its <wp:extent>, so the page does not reflow while images
+load; the alt text is the picture's description (or title) from <wp:docPr>.
+
+The image bytes are copied from the package's media part (word/media/...)
+into an asset directory under a name derived from their SHA-256, so the same
+picture is stored once no matter how many documents of a batch use it (the
+batch workers, and concurrent server requests, can share one directory:
+files are written under a temporary name and moved into place). Writes run
+on a small thread pool while the conversion carries on; a conversion waits
+for its own images before it returns.
+
+Linked (not embedded) pictures and legacy VML images (<w:pict>) are skipped.
+
+A page served from the conversion cache (docx_cache) refers to assets it did
+not write; extract_images() writes them again from the document.
+
+  python docx_to_gcweb_html_extended.py in.docx -o site/page.html --assets-dir site/img
+  → <img src='img/3f5a....png' alt='...' width='320' height='180'/>
+"""
+
+from __future__ import annotations
+import argparse
+import hashlib
+import html
+import os
+import posixpath
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from docx_ir import Image, ImagePart
+from docx_reader import DocxPackage, DocxSource
+
+WRITE_WORKERS = 4
+
+RT_IMAGE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+
+def add_media_arguments(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--assets-dir", metavar="DIR",
+                    help="Extract inline images into DIR (content-addressed, shared across documents) "
+                         "and emit <img> for them. Without it images are left out.")
+    ap.add_argument("--assets-url", metavar="URL",
+                    help="URL prefix of --assets-dir in the generated pages (default: the directory's "
+                         "path relative to the output page, or to --out-dir with --batch; give a "
+                         "site-absolute URL when a batch has subdirectories).")
+
+class AssetOptions(NamedTuple):
+    """Where images go and how pages refer to them; picklable, so it can ride along to batch workers."""
+    directory: str
+    url: str
+
+def asset_options(directory: Optional[str], url: Optional[str],
+                  page_dir: Optional[Path]) -> Optional[AssetOptions]:
+    """AssetOptions from the CLI flags; the default URL is *directory* relative to *page_dir*."""
+    if not directory:
+        return None
+    if url is None:
+        url = os.path.relpath(directory, page_dir) if page_dir is not None else directory
+        url = Path(url).as_posix()
+    if url and not url.endswith("/"):
+        url += "/"
+    return AssetOptions(os.path.abspath(directory), url)
+
+class AssetStore:
+    """A content-addressed asset directory; each file is written once per process while it exists."""
+
+    def __init__(self, directory: str, max_workers: int = WRITE_WORKERS):
+        self.directory = Path(directory)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="docx-assets")
+        self._lock = threading.Lock()
+        self._writes: Dict[str, Future] = {}  # file name -> its write
+
+    def save(self, data: bytes, ext: str) -> Tuple[str, Future]:
+        """Store *data*; returns its file name at once and the (possibly shared) pending write."""
+        name = hashlib.sha256(data).hexdigest()[:32] + ext
+        with self._lock:
+            fut = self._writes.get(name)
+            # Write again after a failed write, or if the file was removed since
+            if fut is None or (fut.done() and (fut.exception() is not None or not (self.directory / name).exists())):
+                fut = self._writes[name] = self._executor.submit(self._write, name, data)
+        return name, fut
+
+    def _write(self, name: str, data: bytes) -> None:
+        path = self.directory / name
+        if path.exists():  # same name, same content: written by an earlier run or another worker
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+_stores: Dict[str, AssetStore] = {}
+_stores_lock = threading.Lock()
+
+def asset_store(directory: str) -> AssetStore:
+    """Per-process AssetStore for *directory*, shared by every conversion in the process."""
+    with _stores_lock:
+        if directory not in _stores:
+            _stores[directory] = AssetStore(directory)
+        return _stores[directory]
+
+class DocumentImages:
+    """
+    Turns one document's pictures (as parsed by docx_ir) into <img> tags. Each
+    image part is read and hashed once per document, however often it is shown.
+    """
+
+    def __init__(self, image_part: ImagePart, options: AssetOptions):
+        self.image_part = image_part
+        self.url = options.url
+        self.store = asset_store(options.directory)
+        self._names: Dict[str, Optional[str]] = {}  # rId -> asset file name (None: not an image part)
+        self._writes: List[Future] = []
+
+    def _asset(self, r_id: str) -> Optional[str]:
+        if r_id not in self._names:
+            name = None
+            part = self.image_part(r_id)
+            if part is not None:
+                partname, data = part
+                ext = posixpath.splitext(partname)[1].lower()
+                name, fut = self.store.save(data, ext)
+                self._writes.append(fut)
+            self._names[r_id] = name
+        return self._names[r_id]
+
+    def img_html(self, image: Image) -> str:
+        """<img> for a picture (docx_ir.Image), or "" if its part is not an image."""
+        name = self._asset(image.r_id)
+        if name is None:
+            return ""
+        attrs = [f"src='{html.escape(self.url + name, quote=True)}'",
+                 f"alt='{html.escape(image.alt, quote=True)}'"]
+        if image.width and image.height:
+            attrs.append(f"width='{image.width}' height='{image.height}'")
+        return "<img " + " ".join(attrs) + "/>"
+
+    def finish(self) -> None:
+        """Wait until this document's images are on disk; raises the first write error."""
+        done, _ = wait(self._writes)
+        for fut in done:
+            fut.result()
+
+def extract_images(source: DocxSource, options: AssetOptions) -> int:
+    """
+    Write every image part the document relates to into the asset directory,
+    under the names a conversion with *options* gives them, without converting
+    the document. Returns the number of images.
+    """
+    store = asset_store(options.directory)
+    writes: List[Future] = []
+    package = DocxPackage(source)
+    try:
+        for rtype, member in package.relationships.values():
+            if rtype == RT_IMAGE:
+                _, fut = store.save(package.read(member), posixpath.splitext(member)[1].lower())
+                writes.append(fut)
+    finally:
+        package.close()
+    for fut in writes:
+        fut.result()
+    return len(writes)
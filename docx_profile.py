@@ -0,0 +1,219 @@
+"""
+Per-stage profiling for the DOCX → GCWeb HTML converters.
+
+A Profiler is handed to iter_html()/convert_to_stream() and timed at these hooks:
+
+  open           open the reader: the package's relationships and its styles and
+                 numbering parts; with --engine docx also parsing document.xml
+  styles         build the styleId → paragraph style table and the numbering index
+                 (docx_ir.BlockParser)
+  read           pull the next body block from the reader (stream: XML parse)
+  parse          turn the block into its IR records (docx_ir)
+  inflate        decompress word/document.xml (inside open, or inside read with
+                 --engine stream)
+  runs_to_html   inline run rendering from the IR
+  table_to_html  table rendering from the IR
+  components     marker-driven components (details, accordion, ...; extended converter)
+  memo           block memo lookup (--incremental)
+  parse_cache    parse cache lookup and store (--parse-cache)
+  images         waiting for extracted images to be written (--assets-dir)
+  block:<kind>   everything else spent on a paragraph or table block
+  write          writing fragments to the output stream
+  targets        rendering further outputs (text, outline) from the recorded blocks
+                 (see docx_targets)
+
+Times are exclusive: a stage's nested stages are not counted in its own time,
+so the rows of the breakdown add up to the total.
+
+The CLI flags (see add_profile_arguments) print the breakdown to stderr and can
+also save a cProfile/pstats dump or a Chrome trace (chrome://tracing, Perfetto).
+"""
+
+from __future__ import annotations
+import argparse
+import contextlib
+import cProfile
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, TypeVar
+
+T = TypeVar("T")
+
+def add_profile_arguments(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--profile", action="store_true",
+                    help="Print a per-stage time breakdown to stderr (converts without --cache-dir).")
+    ap.add_argument("--profile-pstats", metavar="FILE",
+                    help="Also run under cProfile and save the stats to FILE (implies --profile).")
+    ap.add_argument("--profile-trace", metavar="FILE",
+                    help="Also save a Chrome trace JSON of every stage to FILE (implies --profile).")
+
+def profiling_requested(args: argparse.Namespace) -> bool:
+    return bool(args.profile or args.profile_pstats or args.profile_trace)
+
+class _Stage:
+    __slots__ = ("profiler", "name")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.begin(self.name)
+
+    def __exit__(self, *exc):
+        self.profiler.end()
+
+class Profiler:
+    """Exclusive time and call count per stage, plus optional trace events."""
+
+    def __init__(self, record_events: bool = False):
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        # (name, start, duration) in perf_counter seconds, for the Chrome trace
+        self.events: Optional[List[Tuple[str, float, float]]] = [] if record_events else None
+        self._stack: List[list] = []  # [name, start, seconds spent in nested stages]
+        self._in_block = False
+        self.started = time.perf_counter()
+        self.wall: Optional[float] = None
+
+    def begin(self, name: str) -> None:
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def end(self) -> None:
+        name, start, nested = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.totals[name] = self.totals.get(name, 0.0) + elapsed - nested
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        if self.events is not None:
+            self.events.append((name, start, elapsed))
+
+    def stage(self, name: str) -> _Stage:
+        """Context manager timing one stage."""
+        return _Stage(self, name)
+
+    def block(self, kind: Optional[str]) -> None:
+        """
+        Start timing a body block of *kind* ("paragraph", "table"); the
+        previous block's stage ends here, or at the next read. None just ends it.
+        """
+        if self._in_block:
+            self.end()
+        self._in_block = kind is not None
+        if kind is not None:
+            self.begin(f"block:{kind}")
+
+    def iterate(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Yield from *iterable*, timing each step as stage *name*."""
+        it = iter(iterable)
+        while True:
+            self.block(None)
+            self.begin(name)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self.end()
+            yield item
+
+    def timed_reader(self, name: str, fileobj: BinaryIO) -> BinaryIO:
+        """Wrap a binary file so time spent in read() is recorded as stage *name*."""
+        return _TimedReader(self, name, fileobj)
+
+    def finish(self) -> None:
+        """Close any stage left open (e.g. an abandoned conversion) and fix the wall time."""
+        while self._stack:
+            self.end()
+        self._in_block = False
+        self.wall = time.perf_counter() - self.started
+
+    def report(self, file: Optional[TextIO] = None) -> None:
+        """Print the breakdown table (call finish() first)."""
+        wall = self.wall if self.wall is not None else time.perf_counter() - self.started
+        other = max(0.0, wall - sum(self.totals.values()))
+        rows = sorted(self.totals.items(), key=lambda kv: kv[1], reverse=True)
+        print(f"{'stage':<18} {'calls':>8} {'total ms':>10} {'share':>7} {'per call µs':>12}", file=file)
+        for name, seconds in rows:
+            calls = self.counts[name]
+            print(f"{name:<18} {calls:>8} {seconds * 1000:>10.1f} {seconds / wall:>7.1%} "
+                  f"{seconds / calls * 1e6:>12.1f}", file=file)
+        print(f"{'(other)':<18} {'':>8} {other * 1000:>10.1f} {other / wall:>7.1%}", file=file)
+        print(f"{'total':<18} {'':>8} {wall * 1000:>10.1f}", file=file)
+
+    def write_chrome_trace(self, path: Path) -> None:
+        """Save the recorded stages in Chrome's trace event format."""
+        pid = os.getpid()
+        events = [
+            {"name": name, "cat": "docx", "ph": "X", "pid": pid, "tid": 0,
+             "ts": (start - self.started) * 1e6, "dur": duration * 1e6}
+            for name, start, duration in self.events or ()
+        ]
+        Path(path).write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}),
+                              encoding="utf-8")
+
+class NullProfiler(Profiler):
+    """Profiler that records nothing, used when profiling is off."""
+
+    _null_stage = contextlib.nullcontext()
+
+    def begin(self, name):
+        pass
+
+    def end(self):
+        pass
+
+    def stage(self, name):
+        return self._null_stage
+
+    def block(self, kind):
+        pass
+
+    def iterate(self, name, iterable):
+        return iter(iterable)
+
+    def timed_reader(self, name, fileobj):
+        return fileobj
+
+NULL_PROFILER = NullProfiler()
+
+class _TimedReader:
+    def __init__(self, profiler: Profiler, name: str, fileobj: BinaryIO):
+        self._profiler = profiler
+        self._name = name
+        self._fileobj = fileobj
+
+    def read(self, size: int = -1) -> bytes:
+        with self._profiler.stage(self._name):
+            return self._fileobj.read(size)
+
+    def __getattr__(self, attr):
+        return getattr(self._fileobj, attr)
+
+@contextlib.contextmanager
+def profiling(args: argparse.Namespace, log: Optional[TextIO] = None) -> Iterator[Optional[Profiler]]:
+    """
+    Profile the body of the with-statement as requested by the CLI flags and
+    report when it ends. Yields None when no profiling was requested.
+    """
+    if not profiling_requested(args):
+        yield None
+        return
+    profiler = Profiler(record_events=bool(args.profile_trace))
+    cprof = cProfile.Profile() if args.profile_pstats else None
+    if cprof is not None:
+        cprof.enable()
+    try:
+        yield profiler
+    finally:
+        if cprof is not None:
+            cprof.disable()
+            cprof.dump_stats(args.profile_pstats)
+        profiler.finish()
+        profiler.report(log if log is not None else sys.stderr)
+        if args.profile_trace:
+            profiler.write_chrome_trace(Path(args.profile_trace))
@@ -0,0 +1,512 @@
+"""
+Block readers shared by the DOCX → GCWeb HTML converters.
+
+A reader yields the body's blocks (its <w:p> and <w:tbl> elements) in
+document order and exposes the styles and numbering parts; docx_ir parses
+them into the block IR the converters render.
+
+Both engines open the package with DocxPackage, which reads only the parts
+the converter asks for (document, styles, numbering, and pictures as they are
+emitted); media, fonts and embedded objects otherwise stay compressed in the zip.
+
+Engines:
+- "docx":   word/document.xml parsed in one go — the whole body tree in memory.
+- "stream": lxml iterparse over the word/document.xml zip member. Each
+            top-level block is built, handed to the converter, then cleared
+            from the partial tree, so memory stays flat regardless of document
+            size. Only styles.xml and numbering.xml are parsed up front.
+
+Both engines read from a path, the .docx bytes or a binary file object
+(see zip_source); in-memory input is handed to the zip reader without a copy
+or a temp file. A path is memory-mapped: the zip directory lookups and the
+parts read through DocxPackage.read() work on the mapped file, so there are
+no read() syscalls or intermediate buffers, and batch or server workers
+converting the same files share the OS page cache.
+"""
+
+from __future__ import annotations
+import errno
+import io
+import mmap
+import os
+import posixpath
+import struct
+import zipfile
+import zlib
+from typing import BinaryIO, Callable, Dict, Generic, Iterator, Optional, Tuple, TypeVar, Union
+
+from lxml import etree
+
+from docx.oxml.ns import qn
+from docx.oxml.parser import element_class_lookup, parse_xml
+from docx.styles import BabelFish
+
+from docx_profile import NULL_PROFILER, Profiler
+
+ENGINES = ("docx", "stream")
+
+W_BODY = qn("w:body")
+W_P = qn("w:p")
+W_TBL = qn("w:tbl")
+W_STYLE = qn("w:style")
+W_NAME = qn("w:name")
+W_VAL = qn("w:val")
+W_TYPE = qn("w:type")
+W_STYLE_ID = qn("w:styleId")
+W_DEFAULT = qn("w:default")
+W_ABSTRACT_NUM = qn("w:abstractNum")
+W_ABSTRACT_NUM_ID = qn("w:abstractNumId")
+W_NUM = qn("w:num")
+W_NUM_ID = qn("w:numId")
+W_LVL = qn("w:lvl")
+W_LVL_OVERRIDE = qn("w:lvlOverride")
+W_ILVL = qn("w:ilvl")
+W_NUM_FMT = qn("w:numFmt")
+W_NUM_STYLE_LINK = qn("w:numStyleLink")
+
+RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+RT_OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+RT_STYLES = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"
+RT_NUMBERING = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/numbering"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+WML_MAIN_CONTENT_TYPES = {
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.template.main+xml",
+    "application/vnd.ms-word.document.macroEnabled.main+xml",
+    "application/vnd.ms-word.template.macroEnabledTemplate.main+xml",
+}
+
+# A body block: a <w:p> or <w:tbl> element
+Block = etree._Element
+# A .docx given as a path, its bytes, or a binary file object
+DocxSource = Union[str, "os.PathLike[str]", bytes, bytearray, memoryview, BinaryIO]
+T = TypeVar("T")
+
+# ---------------- Input sources ----------------
+class BufferReader(io.RawIOBase):
+    """Seekable read-only file over a bytes-like object; the buffer itself is never copied."""
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]):
+        super().__init__()
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"invalid whence ({whence})")
+        if pos < 0:
+            # OSError like a real file, which zipfile treats as "not a zip file"
+            raise OSError(errno.EINVAL, f"negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(len(self._view), self._pos + size)
+        data = self._view[self._pos:end].tobytes()
+        self._pos = max(self._pos, end)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+class MappedFile(BufferReader):
+    """BufferReader over a read-only memory map of a file; close() unmaps it."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        super().__init__(self._map)
+
+    @property
+    def view(self) -> memoryview:
+        return self._view
+
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+            self._map.close()
+        super().close()
+
+def zip_source(source: DocxSource) -> Union[str, BinaryIO]:
+    """
+    What zipfile.ZipFile should open for *source*:
+    a MappedFile for a path (the path itself if the file cannot be mapped,
+    e.g. an empty file), the file object itself if it is seekable, or a
+    BufferReader over bytes. A non-seekable stream (a socket, a pipe) is read
+    to the end first, since a zip archive needs random access.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        try:
+            return MappedFile(path)
+        except (ValueError, OSError):  # empty file, or not mappable (a FIFO, /dev/stdin)
+            return path
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return BufferReader(source)
+    if hasattr(source, "read"):
+        if getattr(source, "seekable", lambda: False)():
+            return source
+        return BufferReader(source.read())
+    raise TypeError(f"Cannot read a .docx from {type(source).__name__}: "
+                    "expected a path, bytes or a binary file object")
+
+# ---------------- Style table ----------------
+class StyleTable(Generic[T]):
+    """
+    Paragraph styleId → converter-specific info, built once per document.
+    A missing or unknown styleId resolves to the default paragraph style,
+    the same fallback python-docx applies in Paragraph.style.
+    """
+
+    def __init__(self, by_id: Dict[str, T], default: T):
+        self.by_id = by_id
+        self.default = default
+
+    def lookup(self, style_id: Optional[str]) -> T:
+        return self.by_id.get(style_id, self.default) if style_id else self.default
+
+def _is_on(value: Optional[str]) -> bool:
+    return value is not None and value.lower() in ("1", "true", "on")
+
+def build_style_table(styles_element, make_info: Callable[[str], T]) -> StyleTable[T]:
+    """
+    Build a StyleTable from the styles part, calling *make_info(style_name)* once
+    per paragraph style. Names are UI names as python-docx reports them
+    ("Heading 1", not the internal "heading 1"); a nameless style gets "".
+    """
+    by_id: Dict[str, T] = {}
+    default_name = ""
+    if styles_element is not None:
+        for style in styles_element.iterchildren(W_STYLE):
+            if style.get(W_TYPE, "paragraph") != "paragraph":
+                continue
+            name_el = style.find(W_NAME)
+            raw_name = name_el.get(W_VAL) if name_el is not None else None
+            name = BabelFish.internal2ui(raw_name) if raw_name else ""
+            style_id = style.get(W_STYLE_ID)
+            if style_id and style_id not in by_id:  # first definition wins, as in python-docx
+                by_id[style_id] = make_info(name)
+            if _is_on(style.get(W_DEFAULT)):
+                default_name = name  # last default wins
+    return StyleTable(by_id, make_info(default_name))
+
+# ---------------- Numbering index ----------------
+class NumberingIndex:
+    """
+    numId → list kind ("ol"/"ul") per indentation level, resolved once per
+    document from numbering.xml, so a numbered paragraph's kind is a dict lookup.
+    """
+
+    def __init__(self, kinds: Dict[str, Dict[int, str]]):
+        self.kinds = kinds
+
+    def kind(self, num_id: Optional[str], ilvl: int = 0) -> Optional[str]:
+        """List kind of level *ilvl* of *num_id*, or None if the document does not define it."""
+        levels = self.kinds.get(num_id) if num_id else None
+        return levels.get(ilvl) if levels else None
+
+EMPTY_NUMBERING = NumberingIndex({})
+
+def _lvl_kinds(parent) -> Dict[int, str]:
+    """ilvl → list kind of the <w:lvl> children of an abstractNum or lvlOverride."""
+    kinds: Dict[int, str] = {}
+    for lvl in parent.iterchildren(W_LVL):
+        try:
+            ilvl = int(lvl.get(W_ILVL, "0"))
+        except ValueError:
+            continue
+        fmt_el = next(lvl.iterchildren(W_NUM_FMT), None)
+        # numFmt defaults to decimal; "none" (no number shown) is closest to a bullet list
+        fmt = fmt_el.get(W_VAL, "decimal") if fmt_el is not None else "decimal"
+        kinds[ilvl] = "ul" if fmt in ("bullet", "none") else "ol"
+    return kinds
+
+def _numbering_style_num_ids(styles_element) -> Dict[str, str]:
+    """styleId → numId of the numbering styles (targets of <w:numStyleLink>)."""
+    num_ids: Dict[str, str] = {}
+    if styles_element is None:
+        return num_ids
+    for style in styles_element.iterchildren(W_STYLE):
+        if style.get(W_TYPE) != "numbering":
+            continue
+        for num_id in style.iter(W_NUM_ID):
+            num_ids[style.get(W_STYLE_ID)] = num_id.get(W_VAL)
+            break
+    return num_ids
+
+def build_numbering_index(numbering_element, styles_element=None) -> NumberingIndex:
+    """
+    Build a NumberingIndex from the numbering part (None if the document has none):
+    <w:num> → <w:abstractNumId> → per-<w:lvl> <w:numFmt>, with the num's
+    <w:lvlOverride>s applied. An abstractNum that only links to a numbering
+    style (<w:numStyleLink>) takes its levels from the style's numbering, which
+    needs *styles_element*.
+    """
+    if numbering_element is None:
+        return EMPTY_NUMBERING
+    abstract: Dict[str, Dict[int, str]] = {}
+    style_links: Dict[str, str] = {}  # abstractNumId -> numbering styleId
+    for an in numbering_element.iterchildren(W_ABSTRACT_NUM):
+        an_id = an.get(W_ABSTRACT_NUM_ID)
+        abstract[an_id] = _lvl_kinds(an)
+        link = next(an.iterchildren(W_NUM_STYLE_LINK), None)
+        if link is not None:
+            style_links[an_id] = link.get(W_VAL)
+
+    num_abstract: Dict[str, str] = {}  # numId -> abstractNumId
+    overrides: Dict[str, Dict[int, str]] = {}
+    for num in numbering_element.iterchildren(W_NUM):
+        num_id = num.get(W_NUM_ID)
+        an_id = next(num.iterchildren(W_ABSTRACT_NUM_ID), None)
+        if an_id is None:
+            continue
+        num_abstract[num_id] = an_id.get(W_VAL)
+        for override in num.iterchildren(W_LVL_OVERRIDE):
+            overrides.setdefault(num_id, {}).update(_lvl_kinds(override))
+
+    style_num_ids = _numbering_style_num_ids(styles_element) if style_links else {}
+
+    def levels_of(an_id: Optional[str], seen: Tuple[str, ...] = ()) -> Dict[int, str]:
+        levels = abstract.get(an_id, {})
+        link = style_links.get(an_id)
+        if not levels and link and an_id not in seen:
+            linked_num = style_num_ids.get(link)
+            return levels_of(num_abstract.get(linked_num), seen + (an_id,))
+        return levels
+
+    kinds: Dict[str, Dict[int, str]] = {}
+    for num_id, an_id in num_abstract.items():
+        levels = levels_of(an_id)
+        if num_id in overrides:
+            levels = {**levels, **overrides[num_id]}
+        kinds[num_id] = levels
+    return NumberingIndex(kinds)
+
+# ---------------- Package ----------------
+def _relationships(zf: zipfile.ZipFile, source_part: str) -> Dict[str, Tuple[str, str]]:
+    """rId → (relationship type, zip member name) of the internal relationships of *source_part*."""
+    base_dir, name = posixpath.split(source_part)
+    rels_name = posixpath.join(base_dir, "_rels", name + ".rels")
+    try:
+        rels = etree.fromstring(zf.read(rels_name))
+    except KeyError:
+        return {}
+    targets: Dict[str, Tuple[str, str]] = {}
+    for rel in rels.iter(f"{{{RELS_NS}}}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            member = target.lstrip("/")
+        else:
+            member = posixpath.normpath(posixpath.join(base_dir, target))
+        targets[rel.get("Id")] = (rel.get("Type"), member)
+    return targets
+
+def _rel_target(zf: zipfile.ZipFile, source_part: str, reltype: str) -> Optional[str]:
+    """Resolve the zip member name of the first relationship of *reltype* from *source_part*."""
+    for rtype, member in _relationships(zf, source_part).values():
+        if rtype == reltype:
+            return member
+    return None
+
+def _content_type(zf: zipfile.ZipFile, member: str) -> Optional[str]:
+    """Content type [Content_Types].xml declares for *member* (None if it does not say)."""
+    try:
+        types = etree.fromstring(zf.read("[Content_Types].xml"))
+    except KeyError:
+        return None
+    for override in types.iter(f"{{{CT_NS}}}Override"):
+        if override.get("PartName", "").lstrip("/") == member:
+            return override.get("ContentType")
+    ext = posixpath.splitext(member)[1].lstrip(".").lower()
+    for default in types.iter(f"{{{CT_NS}}}Default"):
+        if default.get("Extension", "").lower() == ext:
+            return default.get("ContentType")
+    return None
+
+def _read_mapped(view: memoryview, info: zipfile.ZipInfo) -> bytes:
+    """
+    A stored or deflated member inflated straight from the mapped archive:
+    one decompress call over the mapped bytes instead of zipfile's buffered
+    reads. The local header and CRC are checked, and errors raised, as zipfile does.
+    """
+    offset = info.header_offset
+    header = bytes(view[offset:offset + zipfile.sizeFileHeader])
+    if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Bad magic number for file header of {info.filename!r}")
+    name_len, extra_len = struct.unpack_from("<HH", header, 26)
+    start = offset + zipfile.sizeFileHeader + name_len + extra_len
+    raw = view[start:start + info.compress_size]
+    try:
+        if len(raw) != info.compress_size:
+            raise zipfile.BadZipFile(f"Truncated file {info.filename!r}")
+        if info.compress_type == zipfile.ZIP_STORED:
+            data = raw.tobytes()
+        else:
+            data = zlib.decompress(raw, -zlib.MAX_WBITS, max(info.file_size, 1))  # sized output buffer
+    finally:
+        raw.release()
+    if len(data) != info.file_size or zlib.crc32(data) != info.CRC:
+        raise zipfile.BadZipFile(f"Bad CRC-32 for file {info.filename!r}")
+    return data
+
+class DocxPackage:
+    """
+    Lean read-only view of a .docx package. Opening it reads the zip directory,
+    the package and document relationships and the content types; a part is
+    inflated only when asked for, so media, fonts and embedded objects the
+    converter never emits are never read (python-docx's Document() loads every
+    part up front).
+    """
+
+    def __init__(self, source: DocxSource):
+        opened = zip_source(source)
+        # A mapped path is read member by member straight from the mapping (see read())
+        self._mapped = opened if isinstance(opened, MappedFile) else None
+        try:
+            self.zip = zipfile.ZipFile(opened)
+        except BaseException:
+            if self._mapped is not None:
+                self._mapped.close()
+            raise
+        try:
+            self.document_part = _rel_target(self.zip, "", RT_OFFICE_DOCUMENT) or "word/document.xml"
+            content_type = _content_type(self.zip, self.document_part)
+            if content_type is not None and content_type not in WML_MAIN_CONTENT_TYPES:
+                raise ValueError(f"not a Word file, content type is {content_type!r}")
+            self.relationships = _relationships(self.zip, self.document_part)
+        except BaseException:
+            self.close()
+            raise
+
+    def read(self, member: str) -> bytes:
+        """The (inflated) bytes of *member*; KeyError if the package has no such part."""
+        if self._mapped is not None:
+            info = self.zip.getinfo(member)
+            if info.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) and not info.flag_bits & 0x1:
+                return _read_mapped(self._mapped.view, info)
+        return self.zip.read(member)
+
+    def open_document(self) -> BinaryIO:
+        """The main document part (word/document.xml) as a binary stream."""
+        return self.zip.open(self.document_part)
+
+    def part_xml(self, reltype: str):
+        """The parsed part the document relates to by *reltype* (styles, numbering, ...), or None."""
+        for rtype, member in self.relationships.values():
+            if rtype == reltype:
+                return parse_xml(self.read(member))
+        return None
+
+    def related_part(self, r_id: str) -> Optional[Tuple[str, bytes]]:
+        """(part name, bytes) of the part the document relates to as *r_id* (e.g. a picture's r:embed)."""
+        rel = self.relationships.get(r_id)
+        if rel is None:
+            return None
+        try:
+            return "/" + rel[1], self.read(rel[1])
+        except KeyError:
+            return None
+
+    def close(self) -> None:
+        self.zip.close()
+        if self._mapped is not None:
+            self._mapped.close()
+
+# ---------------- Streaming engine ----------------
+def _stream_body(package: DocxPackage, profiler: Optional[Profiler]) -> Iterator[Block]:
+    with package.open_document() as xml:
+        if profiler is not None:
+            xml = profiler.timed_reader("inflate", xml)
+        events = etree.iterparse(
+            xml,
+            events=("end",),
+            tag=(W_P, W_TBL),
+            remove_blank_text=True,
+            resolve_entities=False,
+            huge_tree=True,
+        )
+        # Same custom element classes as python-docx's own parser (CT_P, CT_Tbl, ...)
+        events.set_element_class_lookup(element_class_lookup)
+        for _, el in events:
+            body = el.getparent()
+            if body is None or body.tag != W_BODY:
+                # Paragraphs/tables nested in cells are handled with their table
+                continue
+            yield el
+            # Drop the block's content and everything before it (bookmarks, sdt, ...).
+            # The emptied element itself stays as the parser's insertion anchor.
+            el.clear()
+            while el.getprevious() is not None:
+                del body[0]
+
+# ---------------- Engine selection ----------------
+class _PackageReader:
+    """Reads the styles and numbering parts from a DocxPackage; the rest on demand."""
+
+    def __init__(self, docx_path: DocxSource, profiler: Optional[Profiler] = None):
+        self.package = DocxPackage(docx_path)
+        self.profiler = profiler
+        self.styles = self.package.part_xml(RT_STYLES)
+        self.numbering = self.package.part_xml(RT_NUMBERING)
+
+    def image_part(self, r_id: str) -> Optional[Tuple[str, bytes]]:
+        """(part name, bytes) of the part the document relates to as *r_id* (a picture's r:embed)."""
+        return self.package.related_part(r_id)
+
+    def blocks(self) -> Iterator[Block]:
+        """The body's blocks; the package is closed once they have all been read."""
+        try:
+            yield from self._blocks()
+        finally:
+            self.package.close()
+
+class TreeReader(_PackageReader):
+    """
+    Reader over the whole body: document.xml is inflated and parsed in one go
+    (with python-docx's element classes), but nothing else of the package
+    beyond the styles and numbering parts is loaded.
+    """
+
+    def __init__(self, docx_path: DocxSource, profiler: Optional[Profiler] = None):
+        super().__init__(docx_path, profiler)
+        with (profiler or NULL_PROFILER).stage("inflate"):
+            data = self.package.read(self.package.document_part)
+        self.document = parse_xml(data)
+
+    def _blocks(self) -> Iterator[Block]:
+        for body in self.document.iterchildren(W_BODY):
+            yield from body.iterchildren(W_P, W_TBL)
+
+class StreamReader(_PackageReader):
+    """Reader that parses styles.xml and numbering.xml now and streams the body on blocks()."""
+
+    def _blocks(self) -> Iterator[Block]:
+        return _stream_body(self.package, self.profiler)
+
+def open_reader(docx_path: DocxSource, engine: str = "docx",
+                profiler: Optional[Profiler] = None) -> Union[TreeReader, StreamReader]:
+    """Open *docx_path* (a path, the .docx bytes or a binary file) with the given reader engine."""
+    if engine == "docx":
+        return TreeReader(docx_path, profiler)
+    if engine == "stream":
+        return StreamReader(docx_path, profiler)
+    raise ValueError(f"Unknown engine {engine!r} (expected one of: {', '.join(ENGINES)})")
@@ -0,0 +1,265 @@
+"""
+Conversion server for the DOCX → GCWeb HTML converters.
+
+A local HTTP server that keeps a pool of warm worker processes (python-docx,
+lxml and the converter already imported), so a conversion costs only the
+conversion itself instead of interpreter start-up plus imports.
+
+  POST /convert[?engine=stream]   body: the .docx bytes   → text/html page
+  GET  /metrics                   queue depth, counters and latency percentiles (JSON)
+  GET  /healthz                   "ok", or 503 while the worker pool cannot be restarted
+
+A worker that dies (e.g. killed by the OS) breaks the whole process pool; the
+server then starts a fresh pool and retries the conversion once.
+
+Start it with the converter's --serve flag:
+  python docx_to_gcweb_html_extended.py --serve 127.0.0.1:8008 --jobs 4
+  curl --data-binary @input.docx http://127.0.0.1:8008/convert
+"""
+
+from __future__ import annotations
+import argparse
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Optional, TextIO, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from docx_cache import ConvertToStream
+from docx_ir import gc_paused
+
+DEFAULT_MAX_UPLOAD_BYTES = 64 * 2**20
+LATENCY_WINDOW = 1000  # requests kept for the percentiles
+SOCKET_TIMEOUT = 30  # seconds a client may stall while sending its request
+
+def add_server_arguments(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--serve", metavar="[HOST:]PORT",
+                    help="Run a conversion server with warm worker processes (see docx_server).")
+    ap.add_argument("--max-upload-mb", type=int, default=DEFAULT_MAX_UPLOAD_BYTES // 2**20,
+                    help="Largest .docx accepted by --serve.")
+
+def parse_address(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def _warm_up(convert_to_stream: ConvertToStream) -> None:
+    # Unpickling convert_to_stream has imported the converter (and python-docx/lxml with it)
+    pass
+
+def _ping() -> int:
+    return os.getpid()
+
+def start_pool(convert_to_stream: ConvertToStream, workers: int) -> ProcessPoolExecutor:
+    """A pool of *workers* processes with the converter imported, all of them already started."""
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_up, initargs=(convert_to_stream,))
+    try:
+        # Start every worker now rather than on the first requests
+        for fut in [pool.submit(_ping) for _ in range(workers)]:
+            fut.result()
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    return pool
+
+def _convert_upload(convert_to_stream: ConvertToStream, data: bytes, engine: str) -> Tuple[str, float]:
+    """Worker side: convert uploaded .docx bytes; returns (html, seconds)."""
+    t0 = time.perf_counter()
+    buf = io.StringIO()
+    with gc_paused():  # a worker process runs one conversion at a time
+        convert_to_stream(data, buf, engine=engine)
+    return buf.getvalue(), time.perf_counter() - t0
+
+class ServerStats:
+    """Request counters and a sliding window of latencies, shared by the handler threads."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self.queued = 0       # accepted, not yet finished
+        self.completed = 0
+        self.failed = 0
+        self.pool_restarts = 0
+        self._latency: Deque[float] = deque(maxlen=window)     # request seconds
+        self._conversion: Deque[float] = deque(maxlen=window)  # worker seconds
+
+    def start(self) -> None:
+        with self._lock:
+            self.queued += 1
+
+    def finish(self, latency: float, conversion: Optional[float]) -> None:
+        with self._lock:
+            self.queued -= 1
+            if conversion is None:
+                self.failed += 1
+            else:
+                self.completed += 1
+                self._latency.append(latency)
+                self._conversion.append(conversion)
+
+    def restarted(self) -> None:
+        with self._lock:
+            self.pool_restarts += 1
+
+    @staticmethod
+    def _percentiles(values) -> Dict[str, Optional[float]]:
+        ordered = sorted(values)
+        result: Dict[str, Optional[float]] = {}
+        for p in (50, 90, 99):
+            # nearest-rank percentile, in milliseconds
+            rank = max(0, -(-p * len(ordered) // 100) - 1)
+            result[f"p{p}"] = round(ordered[rank] * 1000, 1) if ordered else None
+        return result
+
+    def snapshot(self, workers: int) -> Dict[str, object]:
+        with self._lock:
+            latency, conversion = list(self._latency), list(self._conversion)
+            queued, completed, failed = self.queued, self.completed, self.failed
+            restarts = self.pool_restarts
+        return {
+            "workers": workers,
+            "queue_depth": max(0, queued - workers),
+            "in_flight": queued,
+            "completed": completed,
+            "failed": failed,
+            "pool_restarts": restarts,
+            "latency_ms": self._percentiles(latency),
+            "conversion_ms": self._percentiles(conversion),
+        }
+
+class ConversionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], convert_to_stream: ConvertToStream,
+                 workers: int, engine: str, max_upload_bytes: int):
+        self.convert_to_stream = convert_to_stream
+        self.workers = workers
+        self.engine = engine
+        self.max_upload_bytes = max_upload_bytes
+        self.stats = ServerStats()
+        self.pool = start_pool(convert_to_stream, workers)
+        self.healthy = True  # False while a broken pool could not be replaced
+        self._pool_lock = threading.Lock()
+        try:
+            super().__init__(address, _Handler)
+        except BaseException:
+            self.pool.shutdown()
+            raise
+
+    def convert(self, data: bytes, engine: str) -> Tuple[str, float]:
+        """
+        Convert an upload on the pool; returns (html, seconds). If the pool is
+        broken (a worker died), it is replaced and the conversion retried once.
+        """
+        pool = self.pool
+        try:
+            return pool.submit(_convert_upload, self.convert_to_stream, data, engine).result()
+        except BrokenProcessPool:
+            pool = self._replace_pool(pool)
+        return pool.submit(_convert_upload, self.convert_to_stream, data, engine).result()
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self.pool is broken:  # not already replaced by another request
+                broken.shutdown(wait=False, cancel_futures=True)
+                try:
+                    self.pool = start_pool(self.convert_to_stream, self.workers)
+                except Exception:
+                    self.healthy = False
+                    raise BrokenProcessPool("the worker pool could not be restarted")
+                self.healthy = True
+                self.stats.restarted()
+            return self.pool
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown()
+
+class _Handler(BaseHTTPRequestHandler):
+    server: ConversionServer
+    # A stalled upload times out (and the connection is closed) instead of holding its thread
+    timeout = SOCKET_TIMEOUT
+
+    def _send(self, status: int, body: str, content_type: str = "text/plain; charset=utf-8") -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/metrics":
+            self._send(200, json.dumps(self.server.stats.snapshot(self.server.workers)), "application/json")
+        elif path == "/healthz":
+            if self.server.healthy:
+                self._send(200, "ok\n")
+            else:
+                self._send(503, "worker pool down\n")
+        else:
+            self._send(404, "not found\n")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/convert":
+            self._send(404, "not found\n")
+            return
+        engine = parse_qs(url.query).get("engine", [self.server.engine])[-1]
+        if engine not in ("docx", "stream"):
+            self._send(400, f"unknown engine {engine!r}\n")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._send(411, "Content-Length required\n")
+            return
+        if length < 0:
+            self._send(400, "invalid Content-Length\n")
+            return
+        if length > self.server.max_upload_bytes:
+            self._send(413, "upload too large\n")
+            return
+        data = self.rfile.read(length)
+        if len(data) != length:
+            self._send(400, "request body shorter than Content-Length\n")
+            return
+
+        stats = self.server.stats
+        t0 = time.perf_counter()
+        stats.start()
+        conversion = None
+        try:
+            page, conversion = self.server.convert(data, engine)
+        except BrokenProcessPool as e:  # a worker died again on the retry, or no pool could be started
+            self._send(503, f"{type(e).__name__}: {e}\n")
+            return
+        except Exception as e:
+            self._send(422, f"{type(e).__name__}: {e}\n")
+            return
+        finally:
+            stats.finish(time.perf_counter() - t0, conversion)
+        self._send(200, page, "text/html; charset=utf-8")
+
+def run_server(convert_to_stream: ConvertToStream, address: Tuple[str, int],
+               jobs: Optional[int] = None, engine: str = "docx",
+               max_upload_bytes: int = DEFAULT_MAX_UPLOAD_BYTES, log: Optional[TextIO] = None) -> None:
+    """
+    Serve conversions on *address* until interrupted.
+    *convert_to_stream* must be a module-level function (it is sent to the workers).
+    The start-up line goes to *log* (default stdout); requests are logged to stderr.
+    """
+    workers = jobs or os.cpu_count() or 1
+    server = ConversionServer(address, convert_to_stream, workers, engine, max_upload_bytes)
+    print(f"serving on http://{address[0]}:{server.server_address[1]} with {workers} workers",
+          file=log, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
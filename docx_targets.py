@@ -0,0 +1,151 @@
+"""
+Further outputs of the DOCX → GCWeb HTML converters, rendered from the same parse as the page.
+
+Besides the GCWeb page a document can be rendered as
+
+  text      a plain-text search payload: one line per paragraph, one line per
+            table row with its cells separated by tabs
+  outline   a JSON outline of the headings (Heading 1-6), nested by level:
+            [{"level": 1, "text": "...", "children": [...]}, ...]
+
+A Renderer turns IR blocks (docx_ir) into output fragments, which are joined
+with newlines; the converters' render_html() is one. write_targets() feeds
+one parse to several of them: the first renders the blocks as they are
+parsed, and the blocks are recorded for the others, which render them once
+the first is done. Only the first can read the document's parts, so put the
+page first when pictures are extracted.
+
+  html, text, outline = docx_to_gcweb_html.convert("report.docx", renderers=["html", "text", "outline"])
+  python docx_to_gcweb_html.py report.docx -o report.html --text-output report.txt --outline-output report.json
+"""
+
+from __future__ import annotations
+import argparse
+import functools
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
+
+from docx_ir import Block, Cell, ImagePart, Paragraph
+from docx_profile import NULL_PROFILER, Profiler
+
+# IR blocks and the document's image_part (or None) -> output fragments, joined with newlines
+Renderer = Callable[[Iterable[Block], Optional[ImagePart]], Iterator[str]]
+
+# A render target: the name of a built-in renderer, or a Renderer
+Target = Union[str, Renderer]
+
+TARGETS = ("html", "text", "outline")
+
+def add_target_arguments(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--text-output", metavar="FILE",
+                    help="Also write the document as plain text (a search payload) to FILE, "
+                         "from the same parse as the page.")
+    ap.add_argument("--outline-output", metavar="FILE",
+                    help="Also write a JSON outline of the document's headings to FILE, "
+                         "from the same parse as the page.")
+
+def requested_targets(args: argparse.Namespace) -> List[Tuple[str, str]]:
+    """(target, output path) of each further output the CLI flags ask for."""
+    chosen = [("text", args.text_output), ("outline", args.outline_output)]
+    return [(target, path) for target, path in chosen if path]
+
+# ---------------- Text ----------------
+def paragraph_plain_text(paragraph: Paragraph) -> str:
+    """A paragraph's text as rendered on the page (its runs' text, else the fallback text)."""
+    return "".join(paragraph.texts) or paragraph.text
+
+def cell_plain_text(cell: Cell) -> str:
+    """A table cell's text on one line, nested tables included."""
+    chunks = []
+    for block in cell:
+        if isinstance(block, Paragraph):
+            chunks.append(paragraph_plain_text(block))
+        else:
+            chunks.extend(cell_plain_text(c) for row in block.rows for c in row)
+    return " ".join(" ".join(chunks).split())
+
+def render_text(blocks: Iterable[Block], image_part: Optional[ImagePart] = None) -> Iterator[str]:
+    """The document as plain text: non-blank paragraphs, and table rows with tab-separated cells."""
+    for block in blocks:
+        if isinstance(block, Paragraph):
+            text = paragraph_plain_text(block)
+            if text.strip():
+                yield text
+        else:
+            for row in block.rows:
+                cells = [cell_plain_text(cell) for cell in row]
+                if any(cells):
+                    yield "\t".join(cells)
+
+# ---------------- Outline ----------------
+def render_outline(blocks: Iterable[Block], image_part: Optional[ImagePart] = None,
+                   heading_level: Callable[[str], Optional[int]] = lambda name: None) -> Iterator[str]:
+    """
+    The document's headings as a JSON outline, each nested under the closest
+    heading of a higher level before it. *heading_level* maps a paragraph
+    style name to its level (the converter's heading_level()).
+    """
+    outline: List[dict] = []
+    open_headings: List[dict] = []  # the last heading of each level still open
+    levels: Dict[str, Optional[int]] = {}  # style name -> heading level, resolved on first use
+    for block in blocks:
+        if not isinstance(block, Paragraph):
+            continue
+        if block.style not in levels:
+            levels[block.style] = heading_level(block.style)
+        level = levels[block.style]
+        if not level:
+            continue
+        node = {"level": level, "text": " ".join(paragraph_plain_text(block).split()), "children": []}
+        while open_headings and open_headings[-1]["level"] >= level:
+            open_headings.pop()
+        (open_headings[-1]["children"] if open_headings else outline).append(node)
+        open_headings.append(node)
+    yield json.dumps(outline, ensure_ascii=False, indent=2)
+
+def target_renderer(target: Target, html: Renderer,
+                    heading_level: Callable[[str], Optional[int]]) -> Renderer:
+    """The Renderer for *target*: *html* (the converter's page), a built-in one, or *target* itself."""
+    if callable(target):
+        return target
+    if target == "html":
+        return html
+    if target == "text":
+        return render_text
+    if target == "outline":
+        return functools.partial(render_outline, heading_level=heading_level)
+    raise ValueError(f"unknown render target {target!r} (expected one of {', '.join(TARGETS)})")
+
+# ---------------- Fan-out ----------------
+def _recording(blocks: Iterable[Block], recorded: List[Block]) -> Iterator[Block]:
+    for block in blocks:
+        recorded.append(block)
+        yield block
+
+def _write(fragments: Iterable[str], fileobj: TextIO, profiler: Profiler) -> None:
+    sep = ""
+    for fragment in fragments:
+        with profiler.stage("write"):
+            fileobj.write(sep)
+            fileobj.write(fragment)
+        sep = "\n"
+
+def write_targets(blocks: Iterable[Block], image_part: Optional[ImagePart], renderers: Sequence[Renderer],
+                  fileobjs: Sequence[TextIO], profiler: Optional[Profiler] = None) -> None:
+    """
+    Render one parse with each of *renderers*, writing each one's fragments
+    to the text stream at the same position of *fileobjs*. The first renderer
+    streams the blocks as they are parsed; the others render the recorded
+    blocks afterwards (timed as the "targets" stage), without *image_part*.
+    """
+    if not renderers:
+        raise ValueError("no renderers given (expected at least one render target)")
+    profiler = profiler or NULL_PROFILER
+    first, *rest = renderers
+    recorded: List[Block] = []
+    if rest:
+        blocks = _recording(blocks, recorded)
+    _write(first(blocks, image_part), fileobjs[0], profiler)
+    for renderer, fileobj in zip(rest, fileobjs[1:]):
+        with profiler.stage("targets"):
+            _write(renderer(recorded, None), fileobj, profiler)
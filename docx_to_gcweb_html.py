@@ -4,29 +4,40 @@ DOCX → HTML converter with Word-style → WET-BOEW/GCWeb class mapping.
 
 Goals (pragmatic):
 - Preserve paragraph order, headings, basic inline emphasis (bold/italic),
-  simple lists, and tables.
+  lists (nested by level), and tables.
 - Add GCWeb/WET classes based on Word paragraph styles (especially custom styles
   named like "WET Alert Success", "WET Lead", etc.).
 - Emit clean HTML that can be dropped into a GCWeb page template.
 
 Limitations:
-- Word list numbering detection varies by authoring tool; this script uses a
-  best-effort check for docx numbering properties and the built-in "List Bullet"
-  / "List Number" styles.
-- Complex layout (text boxes, multi-column sections, floating images) is not handled.
+- Word list numbering detection varies by authoring tool; this script resolves
+  direct numbering properties through numbering.xml and otherwise falls back to
+  the built-in "List Bullet" / "List Number" styles (levels from "List Bullet 2", ...).
+- Complex layout (text boxes, multi-column sections, image positioning) is not handled;
+  pictures are emitted inline as <img> when --assets-dir is given (see docx_media).
 
 Usage:
   python docx_to_gcweb_html.py input.docx -o output.html
+  python docx_to_gcweb_html.py huge.docx -o output.html --engine stream
+  python docx_to_gcweb_html.py --batch docs/ --out-dir html/ --jobs 8
+  python docx_to_gcweb_html.py --serve 127.0.0.1:8008 --jobs 4
+  python docx_to_gcweb_html.py report.docx -o site/report.html --assets-dir site/img
+  python docx_to_gcweb_html.py report.docx -o report.html --text-output report.txt --outline-output report.json
 """
 
 from __future__ import annotations
-import argparse
 import html
-from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, List
 
-from docx import Document
-from docx.oxml.ns import qn
+from docx_driver import Converter
+from docx_html import ListStack, iter_table_html, runs_to_html, table_is_paged
+from docx_incremental import BlockMemo
+from docx_ir import Block, Paragraph
+from docx_media import AssetOptions, DocumentImages, ImagePart
+from docx_profile import NULL_PROFILER, Profiler
+
+# Bump when a code change alters the HTML produced (invalidates --cache-dir entries)
+__version__ = "1.5.0"
 
 # ---------------- Style → HTML mapping ----------------
 # Map Word paragraph style names to (tag, classes, wrapper_tag, wrapper_classes)
@@ -72,49 +83,6 @@ TABLE_STYLE_TO_CLASS = {
 def esc(s: str) -> str:
     return html.escape(s, quote=True)
 
-def paragraph_is_list(paragraph) -> Tuple[bool, Optional[str]]:
-    """
-    Returns (is_list, list_kind) where list_kind is "ul" or "ol".
-    Best-effort detection: checks built-in style names and numbering properties.
-    """
-    style_name = getattr(paragraph.style, "name", "") or ""
-    if style_name.startswith("List Bullet"):
-        return True, "ul"
-    if style_name.startswith("List Number"):
-        return True, "ol"
-
-    # Check numbering properties in XML
-    p = paragraph._p
-    pPr = p.pPr
-    if pPr is not None and pPr.numPr is not None:
-        # We can't reliably infer bullet vs number without inspecting numbering definitions,
-        # but most numbered lists authored in Word use numPr too.
-        # Default to ul unless style suggests numbering.
-        return True, "ul"
-    return False, None
-
-def runs_to_html(paragraph) -> str:
-    """
-    Convert runs to basic inline HTML (bold/italic/underline).
-    """
-    parts: List[str] = []
-    for run in paragraph.runs:
-        text = run.text
-        if not text:
-            continue
-        frag = esc(text).replace("\n", "<br/>")
-        if run.bold:
-            frag = f"<strong>{frag}</strong>"
-        if run.italic:
-            frag = f"<em>{frag}</em>"
-        if run.underline:
-            frag = f"<u>{frag}</u>"
-        parts.append(frag)
-    # If there were no runs (rare), fall back to paragraph.text
-    if not parts:
-        return esc(paragraph.text)
-    return "".join(parts)
-
 def heading_level(style_name: str) -> Optional[int]:
     if style_name.startswith("Heading "):
         try:
@@ -125,81 +93,106 @@ def heading_level(style_name: str) -> Optional[int]:
             return None
     return None
 
-def table_to_html(table, table_classes: str) -> str:
-    rows = table.rows
-    if not rows:
-        return ""
-    html_rows: List[str] = []
-    # Assume first row is header if it looks like a header (simple heuristic: bold text in first row)
-    header_cells = rows[0].cells
-    ths = "".join(f"<th scope='col'>{esc(c.text.strip())}</th>" for c in header_cells)
-    html_rows.append(f"<thead><tr>{ths}</tr></thead>")
-    body_parts: List[str] = []
-    for r in rows[1:]:
-        tds = "".join(f"<td>{esc(c.text.strip())}</td>" for c in r.cells)
-        body_parts.append(f"<tr>{tds}</tr>")
-    html_rows.append("<tbody>" + "".join(body_parts) + "</tbody>")
-    return f"<table class='{esc(table_classes)}'>" + "".join(html_rows) + "</table>"
+class StyleInfo(NamedTuple):
+    """Everything the converter needs to know about a paragraph style, resolved once per document."""
+    name: str
+    tag: str
+    classes: Optional[str]
+    wrapper_tag: Optional[str]
+    wrapper_classes: Optional[str]
+    heading_level: Optional[int]
+    table_class: Optional[str]
+
+def style_info(style_name: str) -> StyleInfo:
+    tag_name, classes, wrapper_tag, wrapper_classes = STYLE_MAP.get(
+        style_name, ("p", None, None, None)
+    )
+    return StyleInfo(style_name, tag_name, classes, wrapper_tag, wrapper_classes,
+                     heading_level(style_name),
+                     TABLE_STYLE_TO_CLASS.get(style_name))
 
 # ---------------- Main conversion ----------------
-def convert(docx_path: Path) -> str:
-    doc = Document(str(docx_path))
-
+def render_html(blocks: Iterable[Block], image_part: Optional[ImagePart] = None,
+                block_memo: Optional[BlockMemo] = None,
+                profiler: Optional[Profiler] = None,
+                table_page_rows: Optional[int] = None,
+                assets: Optional[AssetOptions] = None) -> Iterator[str]:
+    """
+    Render IR blocks (docx_ir) as the page's HTML fragments; the options are
+    iter_html()'s. Pictures are emitted only with *assets* and an *image_part*
+    reading the document's parts (a reader's or a DocxPackage's).
+    """
+    profiler = profiler or NULL_PROFILER
     out: List[str] = []
     out.append("<main property='mainContentOfPage' class='container'>")
 
-    current_list_kind: Optional[str] = None
+    lists = ListStack()  # open (nested) lists
     pending_table_class: Optional[str] = None
-
-    # Iterate block items in order: paragraphs + tables
-    # python-docx doesn't provide a direct unified iterator, so we walk the XML body children.
-    body = doc.element.body
-    for child in body.iterchildren():
-        tag = child.tag
-
-        # Paragraph
-        if tag.endswith("}p"):
-            paragraph = None
-            # find corresponding paragraph object
-            for p in doc.paragraphs:
-                if p._p is child:
-                    paragraph = p
-                    break
-            if paragraph is None:
+    paged_tables = 0  # numbers the ids of split tables
+    styles: Dict[str, StyleInfo] = {}  # style name -> StyleInfo, resolved on first use
+
+    images = DocumentImages(image_part, assets) if assets and image_part else None
+    img_html = images.img_html if images is not None else None
+
+    # Blocks in document order: paragraphs + tables
+    memo_key = None
+    for block in blocks:
+        if memo_key is not None:
+            block_memo.put(memo_key, out, (lists.snapshot(), pending_table_class, paged_tables))
+            memo_key = None
+
+        # Hand over what the previous block produced before starting on this one
+        yield from out
+        out.clear()
+
+        is_paragraph = isinstance(block, Paragraph)
+        profiler.block("paragraph" if is_paragraph else "table")
+
+        # Replay an unchanged block that starts in the same state as last time
+        if block_memo is not None:
+            with profiler.stage("memo"):
+                memo_key = block_memo.key(block, (lists.snapshot(), pending_table_class, paged_tables))
+                replay = block_memo.get(memo_key)
+            if replay is not None:
+                fragments, (list_state, pending_table_class, paged_tables) = replay
+                lists.restore(list_state)
+                out.extend(fragments)
+                memo_key = None
                 continue
 
-            style_name = getattr(paragraph.style, "name", "") or ""
+        # Paragraph
+        if is_paragraph:
+            paragraph = block
+            style = styles.get(paragraph.style)
+            if style is None:
+                style = styles[paragraph.style] = style_info(paragraph.style)
+            with profiler.stage("runs_to_html"):
+                text_html = runs_to_html(paragraph, img_html)
 
             # Track table classes via marker paragraphs (immediately before a table)
-            if style_name in TABLE_STYLE_TO_CLASS:
-                pending_table_class = TABLE_STYLE_TO_CLASS[style_name]
+            if style.table_class:
+                pending_table_class = style.table_class
 
-            # Close list if we hit a non-list paragraph
-            is_list, kind = paragraph_is_list(paragraph)
-            if not is_list and current_list_kind:
-                out.append(f"</{current_list_kind}>")
-                current_list_kind = None
+            # Close lists if we hit a non-list paragraph (numbered headings included)
+            item = paragraph.list_item
+            if not item or style.heading_level:
+                lists.close(out)
 
             # Headings
-            lvl = heading_level(style_name)
+            lvl = style.heading_level
             if lvl:
-                out.append(f"<h{lvl}>{runs_to_html(paragraph)}</h{lvl}>")
+                out.append(f"<h{lvl}>{text_html}</h{lvl}>")
                 continue
 
-            # List items
-            if is_list:
-                if current_list_kind != kind:
-                    if current_list_kind:
-                        out.append(f"</{current_list_kind}>")
-                    current_list_kind = kind
-                    out.append(f"<{current_list_kind}>")
-                out.append(f"<li>{runs_to_html(paragraph)}</li>")
+            # List items, nested by level
+            if item:
+                kind, level = item
+                lists.item(kind, level, text_html, out)
                 continue
 
             # Style-mapped paragraph/component
-            tag_name, classes, wrapper_tag, wrapper_classes = STYLE_MAP.get(
-                style_name, ("p", None, None, None)
-            )
+            tag_name, classes = style.tag, style.classes
+            wrapper_tag, wrapper_classes = style.wrapper_tag, style.wrapper_classes
 
             # Buttons as <a href="#">
             attrs = []
@@ -210,8 +203,7 @@ def convert(docx_path: Path) -> str:
             if classes:
                 attrs.append(f"class='{esc(classes)}'")
 
-            inner = runs_to_html(paragraph)
-            element_html = f"<{tag_name} " + " ".join(attrs) + f">{inner}</{tag_name}>" if attrs else f"<{tag_name}>{inner}</{tag_name}>"
+            element_html = f"<{tag_name} " + " ".join(attrs) + f">{text_html}</{tag_name}>" if attrs else f"<{tag_name}>{text_html}</{tag_name}>"
 
             if wrapper_tag:
                 wc = f" class='{esc(wrapper_classes)}'" if wrapper_classes else ""
@@ -220,43 +212,48 @@ def convert(docx_path: Path) -> str:
             out.append(element_html)
 
         # Table
-        elif tag.endswith("}tbl"):
-            table = None
-            for t in doc.tables:
-                if t._tbl is child:
-                    table = t
-                    break
-            if table is None:
-                continue
+        else:
+            table = block
             # close any open list before tables
-            if current_list_kind:
-                out.append(f"</{current_list_kind}>")
-                current_list_kind = None
+            lists.close(out)
 
             table_classes = pending_table_class or "table"
             pending_table_class = None
-            out.append(table_to_html(table, table_classes))
-
-        # Section properties etc are ignored
-
-    if current_list_kind:
-        out.append(f"</{current_list_kind}>")
+            table_id = "table"
+            if table_is_paged(table, table_page_rows):
+                paged_tables += 1
+                table_id = f"table-{paged_tables}"
+            with profiler.stage("table_to_html"):
+                for fragment in iter_table_html(table, table_classes, table_page_rows, table_id, img_html):
+                    out.append(fragment)
+                    if block_memo is None:
+                        # Hand big tables over chunk by chunk
+                        yield from out
+                        out.clear()
+    profiler.block(None)
+
+    if memo_key is not None:
+        block_memo.put(memo_key, out, (lists.snapshot(), pending_table_class, paged_tables))
+
+    lists.close(out)
+
+    if images is not None:
+        with profiler.stage("images"):
+            images.finish()
 
     out.append("</main>")
-    return "\n".join(out)
-
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("input", help="Path to input .docx")
-    ap.add_argument("-o", "--output", help="Output HTML file path. If omitted, prints to stdout.")
-    args = ap.parse_args()
-
-    html_out = convert(Path(args.input))
-
-    if args.output:
-        Path(args.output).write_text(html_out, encoding="utf-8")
-    else:
-        print(html_out)
+    yield from out
+
+CONVERTER = Converter("docx_to_gcweb_html", __name__, __version__, render_html, heading_level,
+                      lambda: (STYLE_MAP, TABLE_STYLE_TO_CLASS))
+
+iter_html = CONVERTER.iter_html
+cache_fingerprint = CONVERTER.cache_fingerprint
+convert = CONVERTER.convert
+convert_to_stream = CONVERTER.convert_to_stream
+convert_to_streams = CONVERTER.convert_to_streams
+convert_async = CONVERTER.convert_async
+main = CONVERTER.main
 
 if __name__ == "__main__":
     main()
@@ -26,18 +26,33 @@ Now supports:
     <nav aria-label="Pagination">
       <ul class="pagination"> ... </ul>
     </nav>
+- Further marker-driven components can be plugged in by subclassing Component
+  and calling register_component().
+- Inline images (<w:drawing>) with --assets-dir (see docx_media).
 
 Usage:
-  python docx_to_gcweb_html.py input.docx -o output.html
+  python docx_to_gcweb_html_extended.py input.docx -o output.html
+  python docx_to_gcweb_html_extended.py huge.docx -o output.html --engine stream
+  python docx_to_gcweb_html_extended.py --batch docs/ --out-dir html/ --jobs 8
+  python docx_to_gcweb_html_extended.py --serve 127.0.0.1:8008 --jobs 4
+  python docx_to_gcweb_html_extended.py manual.docx -o manual.html --incremental manual.blocks.json
+  python docx_to_gcweb_html_extended.py report.docx -o site/report.html --assets-dir site/img
+  python docx_to_gcweb_html_extended.py report.docx -o report.html --text-output report.txt --outline-output report.json
 """
 
 from __future__ import annotations
-import argparse
 import html
-from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, NamedTuple, Optional, List
 
-from docx import Document
+from docx_driver import Converter
+from docx_html import ListStack, iter_table_html, runs_to_html, table_is_paged, wrap_fragments
+from docx_incremental import BlockMemo
+from docx_ir import Block, Paragraph
+from docx_media import AssetOptions, DocumentImages, ImagePart
+from docx_profile import NULL_PROFILER, Profiler
+
+# Bump when a code change alters the HTML produced (invalidates --cache-dir entries)
+__version__ = "1.5.0"
 
 # ---------------- Style → HTML mapping ----------------
 # Map Word paragraph style names to (tag, classes, wrapper_tag, wrapper_classes)
@@ -79,39 +94,6 @@ TABLE_STYLE_TO_CLASS = {
 def esc(s: str) -> str:
     return html.escape(s, quote=True)
 
-def paragraph_is_list(paragraph) -> Tuple[bool, Optional[str]]:
-    """
-    Returns (is_list, list_kind) where list_kind is "ul" or "ol".
-    Best-effort detection: checks built-in style names and numbering properties.
-    """
-    style_name = getattr(paragraph.style, "name", "") or ""
-    if style_name.startswith("List Bullet"):
-        return True, "ul"
-    if style_name.startswith("List Number"):
-        return True, "ol"
-
-    # Check numbering properties in XML (best-effort; type unknown => default ul)
-    pPr = paragraph._p.pPr
-    if pPr is not None and pPr.numPr is not None:
-        return True, "ul"
-    return False, None
-
-def runs_to_html(paragraph) -> str:
-    """Convert runs to basic inline HTML (bold/italic/underline)."""
-    parts: List[str] = []
-    for run in paragraph.runs:
-        if not run.text:
-            continue
-        frag = esc(run.text).replace("\n", "<br/>")
-        if run.bold:
-            frag = f"<strong>{frag}</strong>"
-        if run.italic:
-            frag = f"<em>{frag}</em>"
-        if run.underline:
-            frag = f"<u>{frag}</u>"
-        parts.append(frag)
-    return "".join(parts) if parts else esc(paragraph.text)
-
 def heading_level(style_name: str) -> Optional[int]:
     if style_name.startswith("Heading "):
         try:
@@ -122,243 +104,374 @@ def heading_level(style_name: str) -> Optional[int]:
             return None
     return None
 
-def table_to_html(table, table_classes: str) -> str:
-    rows = table.rows
-    if not rows:
-        return ""
-    html_rows: List[str] = []
-
-    header_cells = rows[0].cells
-    ths = "".join(f"<th scope='col'>{esc(c.text.strip())}</th>" for c in header_cells)
-    html_rows.append(f"<thead><tr>{ths}</tr></thead>")
-
-    body_parts: List[str] = []
-    for r in rows[1:]:
-        tds = "".join(f"<td>{esc(c.text.strip())}</td>" for c in r.cells)
-        body_parts.append(f"<tr>{tds}</tr>")
-    html_rows.append("<tbody>" + "".join(body_parts) + "</tbody>")
+class StyleInfo(NamedTuple):
+    """Everything the converter needs to know about a paragraph style, resolved once per document."""
+    name: str
+    tag: str
+    classes: Optional[str]
+    wrapper_tag: Optional[str]
+    wrapper_classes: Optional[str]
+    heading_level: Optional[int]
+    table_class: Optional[str]
+
+def style_info(style_name: str) -> StyleInfo:
+    tag_name, classes, wrapper_tag, wrapper_classes = STYLE_MAP.get(
+        style_name, ("p", None, None, None)
+    )
+    return StyleInfo(style_name, tag_name, classes, wrapper_tag, wrapper_classes,
+                     heading_level(style_name),
+                     TABLE_STYLE_TO_CLASS.get(style_name))
+
+# ---------------- GCWeb components ----------------
+# Components are driven by marker paragraph styles and registered into a dispatch
+# table compiled from their style names, so per-paragraph dispatch is one dict
+# lookup no matter how many components exist. Registration order is priority:
+# an open component sees a paragraph before any component registered after it
+# (e.g. an open accordion item swallows a "WET Pagination Start" as panel text).
+
+class ConversionState:
+    """Output buffer plus everything the converter carries from one block to the next."""
+
+    def __init__(self):
+        self.out: List[str] = []
+        # Open (nested) lists
+        self.lists = ListStack()
+        # Table marker state
+        self.pending_table_class: Optional[str] = None
+        self.pending_table_responsive: bool = False  # if True wrap next table in <div class="table-responsive">
+        # Open components: name -> component-specific state (e.g. accordion: item open?)
+        self.open: Dict[str, Any] = {}
+        # Tables split into pages so far (numbers their ids)
+        self.paged_tables = 0
+
+    def close_list(self) -> None:
+        """Close any open lists (with their pending item)."""
+        self.lists.close(self.out)
+
+    def close(self, name: str) -> None:
+        """Close component *name* if it is open."""
+        if name in self.open:
+            COMPONENTS[name].close(self)
+            del self.open[name]
+
+    def open_components(self) -> List[Component]:
+        """Open components in priority order."""
+        if not self.open:
+            return []
+        return sorted((COMPONENTS[name] for name in self.open), key=lambda c: c.priority)
+
+    def snapshot(self) -> tuple:
+        return (self.lists.snapshot(), self.pending_table_class, self.pending_table_responsive,
+                tuple(sorted(self.open.items())), self.paged_tables)
+
+    def restore(self, saved: tuple) -> None:
+        (list_state, self.pending_table_class, self.pending_table_responsive,
+         open_items, self.paged_tables) = saved
+        self.lists.restore(list_state)
+        self.open = dict(open_items)
+
+class Component:
+    """
+    A marker-driven GCWeb component.
 
-    return f"<table class='{esc(table_classes)}'>" + "".join(html_rows) + "</table>"
+    markers: style name -> method name, recognised anywhere (they open/close the component).
+    items:   style name -> method name, recognised only while the component is open.
+    Handler methods are called as method(state, text_html).
+    """
+    name = ""
+    markers: Dict[str, str] = {}
+    items: Dict[str, str] = {}
+    closes_before_table = False  # auto-close when a table appears
+    priority = 0  # set on registration
+
+    def other(self, state: ConversionState, text_html: str) -> bool:
+        """
+        Called while open for a paragraph that isn't one of ours (and that no
+        higher-priority component consumed). Return True to consume it.
+        """
+        return False
+
+    def close(self, state: ConversionState) -> None:
+        """Emit the closing markup; the component is marked closed by ConversionState.close()."""
+
+class Accordion(Component):
+    """
+    <section class='wb-accordion'>
+      <details><summary>...</summary><p>...</p></details> ...
+    </section>
+    State: True while an item (<details>) is open.
+    """
+    name = "accordion"
+    markers = {"WET Accordion Start": "start", "WET Accordion End": "end"}
+    items = {"WET Accordion Heading": "heading", "WET Accordion Panel": "panel"}
+
+    def start(self, state, text_html):
+        state.close_list()
+        state.close("details")
+        state.close("pagination")
+        state.close(self.name)
+        state.out.append("<section class='wb-accordion'>")
+        state.open[self.name] = False
+
+    def end(self, state, text_html):
+        state.close_list()
+        state.close("details")
+        state.close("pagination")
+        state.close(self.name)
+
+    def heading(self, state, text_html):
+        state.close_list()
+        state.close("details")
+        # start a new accordion item
+        self._close_item(state)
+        state.out.append("<details>")
+        state.out.append(f"<summary>{text_html}</summary>")
+        state.open[self.name] = True
+
+    def panel(self, state, text_html):
+        # panels become paragraphs inside the current accordion item
+        state.close_list()
+        if not state.open[self.name]:
+            # If author forgot a heading, create a fallback item
+            state.out.append("<details><summary>Details</summary>")
+            state.open[self.name] = True
+        state.out.append(f"<p>{text_html}</p>")
+
+    def other(self, state, text_html):
+        # If any other paragraph appears inside an accordion item, treat it as panel content (safe default)
+        if state.open[self.name]:
+            state.out.append(f"<p>{text_html}</p>")
+            return True
+        return False
+
+    def _close_item(self, state):
+        if state.open.get(self.name):
+            state.out.append("</details>")
+            state.open[self.name] = False
+
+    def close(self, state):
+        self._close_item(state)
+        state.out.append("</section>")
+
+class Pagination(Component):
+    """<nav aria-label='Pagination'><ul class='pagination'> ... </ul></nav>"""
+    name = "pagination"
+    markers = {"WET Pagination Start": "start", "WET Pagination End": "end"}
+    items = {
+        "WET Pagination Item": "item",
+        "WET Pagination Active": "active",
+        "WET Pagination Disabled": "disabled",
+    }
+    # tables often shouldn't appear inside pagination
+    closes_before_table = True
+
+    def start(self, state, text_html):
+        state.close_list()
+        state.close("details")
+        state.close(self.name)
+        # Keep accordion separate; if someone starts pagination inside accordion, it's invalid—treat as outside.
+        state.out.append("<nav aria-label='Pagination'><ul class='pagination'>")
+        state.open[self.name] = True
+
+    def end(self, state, text_html):
+        state.close_list()
+        state.close("details")
+        state.close(self.name)
+
+    def item(self, state, text_html):
+        state.close_list()
+        state.close("details")
+        state.out.append(f"<li><a href='#'>{text_html}</a></li>")
+
+    def active(self, state, text_html):
+        state.close_list()
+        state.close("details")
+        state.out.append(f"<li class='active'><a href='#' aria-current='page'>{text_html}</a></li>")
+
+    def disabled(self, state, text_html):
+        state.close_list()
+        state.close("details")
+        state.out.append(f"<li class='disabled'><span>{text_html}</span></li>")
+
+    def other(self, state, text_html):
+        # If a non-pagination paragraph appears, close pagination and fall through
+        state.close_list()
+        state.close("details")
+        state.close(self.name)
+        return False
+
+    def close(self, state):
+        state.out.append("</ul></nav>")
+
+class Details(Component):
+    """<details><summary>...</summary><p>...</p></details> (outside accordions)"""
+    name = "details"
+    markers = {"WET Details Summary": "summary", "WET Details Content": "content"}
+    closes_before_table = True
+
+    def summary(self, state, text_html):
+        state.close_list()
+        state.close(self.name)
+        state.out.append("<details>")
+        state.out.append(f"<summary>{text_html}</summary>")
+        state.open[self.name] = True
+
+    def content(self, state, text_html):
+        state.close_list()
+        if self.name not in state.open:
+            # If author forgot summary, open a default details
+            state.out.append("<details><summary>Details</summary>")
+            state.open[self.name] = True
+        state.out.append(f"<p>{text_html}</p>")
+
+    def other(self, state, text_html):
+        # If details content has ended, close it before continuing
+        state.close(self.name)
+        return False
+
+    def close(self, state):
+        state.out.append("</details>")
+
+class _Handler(NamedTuple):
+    component: Component
+    method: Callable[[ConversionState, str], None]
+    only_when_open: bool
+
+COMPONENTS: Dict[str, Component] = {}
+_DISPATCH: Dict[str, _Handler] = {}
+
+def register_component(component: Component) -> None:
+    """
+    Add a component after all registered ones (lowest priority) and compile its
+    marker/item styles into the dispatch table.
+    """
+    if component.name in COMPONENTS:
+        raise ValueError(f"Component {component.name!r} is already registered")
+    for style_name in (*component.markers, *component.items):
+        if style_name in _DISPATCH:
+            raise ValueError(f"Style {style_name!r} is already handled by {_DISPATCH[style_name].component.name!r}")
+    component.priority = len(COMPONENTS)
+    COMPONENTS[component.name] = component
+    for style_name, method in component.markers.items():
+        _DISPATCH[style_name] = _Handler(component, getattr(component, method), False)
+    for style_name, method in component.items.items():
+        _DISPATCH[style_name] = _Handler(component, getattr(component, method), True)
+
+for _component in (Accordion(), Pagination(), Details()):
+    register_component(_component)
+
+def dispatch_component_paragraph(state: ConversionState, style_name: str, text_html: str) -> bool:
+    """
+    Give a paragraph to the components. Returns True if one of them consumed it,
+    False if it should be rendered as ordinary content.
+    """
+    handler = _DISPATCH.get(style_name)
+    if handler is not None and handler.only_when_open and handler.component.name not in state.open:
+        handler = None  # e.g. an accordion heading outside any accordion is plain text
+
+    # Open components ahead of the handler's own get the first look
+    for component in state.open_components():
+        if handler is not None and component.priority >= handler.component.priority:
+            break
+        if component.other(state, text_html):
+            return True
+
+    if handler is not None:
+        handler.method(state, text_html)
+        return True
+    return False
 
 # ---------------- Main conversion ----------------
-def convert(docx_path: Path) -> str:
-    doc = Document(str(docx_path))
-
-    out: List[str] = []
+def render_html(blocks: Iterable[Block], image_part: Optional[ImagePart] = None,
+                block_memo: Optional[BlockMemo] = None,
+                profiler: Optional[Profiler] = None,
+                table_page_rows: Optional[int] = None,
+                assets: Optional[AssetOptions] = None) -> Iterator[str]:
+    """
+    Render IR blocks (docx_ir) as the page's HTML fragments; the options are
+    iter_html()'s. Pictures are emitted only with *assets* and an *image_part*
+    reading the document's parts (a reader's or a DocxPackage's).
+    """
+    profiler = profiler or NULL_PROFILER
+    state = ConversionState()
+    out = state.out
     out.append("<main property='mainContentOfPage' class='container'>")
-
-    # Fast lookup: underlying XML element -> paragraph/table object
-    para_by_el = {p._p: p for p in doc.paragraphs}
-    tbl_by_el = {t._tbl: t for t in doc.tables}
-
-    # Generic list state
-    current_list_kind: Optional[str] = None
-
-    # Table marker state
-    pending_table_class: Optional[str] = None
-    pending_table_responsive: bool = False  # if True wrap next table in <div class="table-responsive">
-
-    # Details state (outside accordion)
-    in_details: bool = False
-
-    # Accordion state
-    in_accordion: bool = False
-    accordion_item_open: bool = False  # <details> inside accordion open?
-
-    # Pagination state
-    in_pagination: bool = False
-
-    def close_list_if_open():
-        nonlocal current_list_kind
-        if current_list_kind:
-            out.append(f"</{current_list_kind}>")
-            current_list_kind = None
-
-    def close_details_if_open():
-        nonlocal in_details
-        if in_details:
-            out.append("</details>")
-            in_details = False
-
-    def close_accordion_item_if_open():
-        nonlocal accordion_item_open
-        if accordion_item_open:
-            out.append("</details>")
-            accordion_item_open = False
-
-    def close_accordion_if_open():
-        nonlocal in_accordion
-        if in_accordion:
-            close_accordion_item_if_open()
-            out.append("</section>")
-            in_accordion = False
-
-    def close_pagination_if_open():
-        nonlocal in_pagination
-        if in_pagination:
-            out.append("</ul></nav>")
-            in_pagination = False
-
-    def close_all_structures_before_new_block():
-        # When entering a heading/table/normal paragraph, close incompatible open blocks.
-        # Note: Accordion is explicit start/end; we don't auto-close it unless we hit its End marker.
-        close_list_if_open()
-        # Details blocks auto-close when content stops, but we also close when "something else" starts.
-        close_details_if_open()
-        # Pagination is explicit start/end; don't auto-close unless we hit End marker, but tables/headings should close it.
-        # We'll be conservative: close pagination when a table appears (common in authored docs).
-        # (You can remove this if you want strict marker-only behaviour.)
-        # close_pagination_if_open()
-
-    body = doc.element.body
-    for child in body.iterchildren():
-        tag = child.tag
-
-        # Paragraph
-        if tag.endswith("}p"):
-            paragraph = para_by_el.get(child)
-            if paragraph is None:
-                continue
-
-            style_name = getattr(paragraph.style, "name", "") or ""
-            text_html = runs_to_html(paragraph)
-
-            # ---------- Accordion markers ----------
-            if style_name == "WET Accordion Start":
-                close_list_if_open()
-                close_details_if_open()
-                close_pagination_if_open()
-                close_accordion_if_open()
-                out.append("<section class='wb-accordion'>")
-                in_accordion = True
-                accordion_item_open = False
-                continue
-
-            if style_name == "WET Accordion End":
-                close_list_if_open()
-                close_details_if_open()
-                close_pagination_if_open()
-                close_accordion_if_open()
+    styles: Dict[str, StyleInfo] = {}  # style name -> StyleInfo, resolved on first use
+
+    images = DocumentImages(image_part, assets) if assets and image_part else None
+    img_html = images.img_html if images is not None else None
+
+    memo_key = None
+    for block in blocks:
+        if memo_key is not None:
+            block_memo.put(memo_key, out, state.snapshot())
+            memo_key = None
+
+        # Hand over what the previous block produced before starting on this one
+        yield from out
+        out.clear()
+
+        is_paragraph = isinstance(block, Paragraph)
+        profiler.block("paragraph" if is_paragraph else "table")
+
+        # Replay an unchanged block that starts in the same state as last time
+        if block_memo is not None:
+            with profiler.stage("memo"):
+                memo_key = block_memo.key(block, state.snapshot())
+                replay = block_memo.get(memo_key)
+            if replay is not None:
+                fragments, state_after = replay
+                out.extend(fragments)
+                state.restore(state_after)
+                memo_key = None
                 continue
 
-            if in_accordion:
-                if style_name == "WET Accordion Heading":
-                    close_list_if_open()
-                    close_details_if_open()
-                    # start a new accordion item
-                    close_accordion_item_if_open()
-                    out.append("<details>")
-                    out.append(f"<summary>{text_html}</summary>")
-                    accordion_item_open = True
-                    continue
-                if style_name == "WET Accordion Panel":
-                    # panels become paragraphs inside the current accordion item
-                    if not accordion_item_open:
-                        # If author forgot a heading, create a fallback item
-                        out.append("<details><summary>Details</summary>")
-                        accordion_item_open = True
-                    out.append(f"<p>{text_html}</p>")
-                    continue
-                # If any other paragraph appears inside accordion, treat it as panel content (safe default)
-                if accordion_item_open:
-                    out.append(f"<p>{text_html}</p>")
-                    continue
-
-            # ---------- Pagination markers ----------
-            if style_name == "WET Pagination Start":
-                close_list_if_open()
-                close_details_if_open()
-                close_pagination_if_open()
-                # Keep accordion separate; if someone starts pagination inside accordion, it's invalid—treat as outside.
-                out.append("<nav aria-label='Pagination'><ul class='pagination'>")
-                in_pagination = True
-                continue
-
-            if style_name == "WET Pagination End":
-                close_list_if_open()
-                close_details_if_open()
-                close_pagination_if_open()
-                continue
-
-            if in_pagination:
-                close_list_if_open()
-                close_details_if_open()
-
-                label = text_html
-                if style_name == "WET Pagination Active":
-                    out.append(f"<li class='active'><a href='#' aria-current='page'>{label}</a></li>")
-                    continue
-                if style_name == "WET Pagination Disabled":
-                    out.append(f"<li class='disabled'><span>{label}</span></li>")
-                    continue
-                # default item
-                if style_name in ("WET Pagination Item",):
-                    out.append(f"<li><a href='#'>{label}</a></li>")
-                    continue
-
-                # If a non-pagination paragraph appears, close pagination and fall through
-                close_pagination_if_open()
-                # fall through to normal handling of this paragraph
-
-            # ---------- Details/Summary blocks (outside accordion) ----------
-            if style_name == "WET Details Summary":
-                close_list_if_open()
-                close_details_if_open()
-                out.append("<details>")
-                out.append(f"<summary>{text_html}</summary>")
-                in_details = True
-                continue
-
-            if style_name == "WET Details Content":
-                close_list_if_open()
-                if not in_details:
-                    # If author forgot summary, open a default details
-                    out.append("<details><summary>Details</summary>")
-                    in_details = True
-                out.append(f"<p>{text_html}</p>")
+        # Paragraph
+        if is_paragraph:
+            paragraph = block
+            style_name = paragraph.style
+            style = styles.get(style_name)
+            if style is None:
+                style = styles[style_name] = style_info(style_name)
+            with profiler.stage("runs_to_html"):
+                text_html = runs_to_html(paragraph, img_html)
+
+            # ---------- Components (accordion, pagination, details, ...) ----------
+            with profiler.stage("components"):
+                consumed = dispatch_component_paragraph(state, style_name, text_html)
+            if consumed:
                 continue
 
-            # If details content has ended, close it before continuing
-            if in_details:
-                close_details_if_open()
-
             # ---------- Table marker paragraphs ----------
-            if style_name in TABLE_STYLE_TO_CLASS:
-                pending_table_class = TABLE_STYLE_TO_CLASS[style_name]
+            if style.table_class:
+                state.pending_table_class = style.table_class
             if style_name == "WET Table Responsive":
-                pending_table_responsive = True
+                state.pending_table_responsive = True
 
             # ---------- Close lists when necessary ----------
-            is_list, kind = paragraph_is_list(paragraph)
-            if not is_list and current_list_kind:
-                out.append(f"</{current_list_kind}>")
-                current_list_kind = None
+            item = paragraph.list_item
+            if not item:
+                state.close_list()
 
             # ---------- Headings ----------
-            lvl = heading_level(style_name)
+            lvl = style.heading_level
             if lvl:
-                close_list_if_open()
-                close_details_if_open()
+                state.close_list()
+                state.close("details")
                 # headings should not live inside pagination
                 # (leave accordion as explicit markers)
                 out.append(f"<h{lvl}>{text_html}</h{lvl}>")
                 continue
 
-            # ---------- Lists ----------
-            if is_list:
-                # Enter list
-                if current_list_kind != kind:
-                    if current_list_kind:
-                        out.append(f"</{current_list_kind}>")
-                    current_list_kind = kind
-                    out.append(f"<{current_list_kind}>")
-                out.append(f"<li>{text_html}</li>")
+            # ---------- Lists (nested by level) ----------
+            if item:
+                kind, level = item
+                state.lists.item(kind, level, text_html, out)
                 continue
 
             # ---------- Regular mapped paragraph/component ----------
-            tag_name, classes, wrapper_tag, wrapper_classes = STYLE_MAP.get(
-                style_name, ("p", None, None, None)
-            )
+            tag_name, classes = style.tag, style.classes
+            wrapper_tag, wrapper_classes = style.wrapper_tag, style.wrapper_classes
 
             attrs: List[str] = []
             if tag_name == "a":
@@ -379,51 +492,60 @@ def convert(docx_path: Path) -> str:
             out.append(element_html)
 
         # Table
-        elif tag.endswith("}tbl"):
-            table = tbl_by_el.get(child)
-            if table is None:
-                continue
-
-            close_list_if_open()
-            close_details_if_open()
-            # tables often shouldn't appear inside pagination
-            close_pagination_if_open()
+        else:
+            table = block
+            state.close_list()
             # accordion remains explicit via end marker (don't auto-close)
-
-            table_classes = pending_table_class or "table"
-            pending_table_class = None
-
-            table_html = table_to_html(table, table_classes)
-
-            if pending_table_responsive:
-                out.append(f"<div class='table-responsive'>{table_html}</div>")
-                pending_table_responsive = False
-            else:
-                out.append(table_html)
-
-        # Ignore other child types
+            for component in reversed(state.open_components()):
+                if component.closes_before_table:
+                    state.close(component.name)
+
+            table_classes = state.pending_table_class or "table"
+            state.pending_table_class = None
+
+            table_id = "table"
+            if table_is_paged(table, table_page_rows):
+                state.paged_tables += 1
+                table_id = f"table-{state.paged_tables}"
+
+            with profiler.stage("table_to_html"):
+                fragments = iter_table_html(table, table_classes, table_page_rows, table_id, img_html)
+                if state.pending_table_responsive:
+                    fragments = wrap_fragments(fragments, "<div class='table-responsive'>", "</div>")
+                    state.pending_table_responsive = False
+                for fragment in fragments:
+                    out.append(fragment)
+                    if block_memo is None:
+                        # Hand big tables over chunk by chunk
+                        yield from out
+                        out.clear()
+    profiler.block(None)
+
+    if memo_key is not None:
+        block_memo.put(memo_key, out, state.snapshot())
 
     # Close any open structures
-    close_list_if_open()
-    close_details_if_open()
-    close_pagination_if_open()
-    close_accordion_if_open()
-
-    out.append("</main>")
-    return "\n".join(out)
+    state.close_list()
+    for component in reversed(state.open_components()):
+        state.close(component.name)
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("input", help="Path to input .docx")
-    ap.add_argument("-o", "--output", help="Output HTML file path. If omitted, prints to stdout.")
-    args = ap.parse_args()
+    if images is not None:
+        with profiler.stage("images"):
+            images.finish()
 
-    html_out = convert(Path(args.input))
-
-    if args.output:
-        Path(args.output).write_text(html_out, encoding="utf-8")
-    else:
-        print(html_out)
+    out.append("</main>")
+    yield from out
+
+CONVERTER = Converter("docx_to_gcweb_html_extended", __name__, __version__, render_html, heading_level,
+                      lambda: (STYLE_MAP, TABLE_STYLE_TO_CLASS))
+
+iter_html = CONVERTER.iter_html
+cache_fingerprint = CONVERTER.cache_fingerprint
+convert = CONVERTER.convert
+convert_to_stream = CONVERTER.convert_to_stream
+convert_to_streams = CONVERTER.convert_to_streams
+convert_async = CONVERTER.convert_async
+main = CONVERTER.main
 
 if __name__ == "__main__":
     main()
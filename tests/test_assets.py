@@ -0,0 +1,51 @@
+import hashlib
+
+import pytest
+
+import docx_to_gcweb_html
+import docx_to_gcweb_html_extended
+from docx_cache import ConversionCache, cached_convert
+from docx_media import AssetOptions
+from wordml import docx, p, picture, tbl, tc, tr
+
+CONVERTERS = (docx_to_gcweb_html, docx_to_gcweb_html_extended)
+
+PNG = b"\x89PNG\r\n\x1a\nnot really an image"
+ASSET = hashlib.sha256(PNG).hexdigest()[:32] + ".png"
+UPLOAD = docx(p("Intro"), picture("rId7", alt="Chart"), tbl(tr(tc("H")), tr(tc(picture("rId7")))),
+              media={"rId7": PNG})
+
+@pytest.mark.parametrize("converter", CONVERTERS)
+def test_pictures_are_written_once_and_referenced(converter, tmp_path):
+    assets = AssetOptions(str(tmp_path / "img"), "img/")
+    page = converter.convert(UPLOAD, assets=assets)
+    assert f"<p><img src='img/{ASSET}' alt='Chart' width='100' height='50'/></p>" in page
+    assert f"<td><img src='img/{ASSET}' alt='' width='100' height='50'/></td>" in page
+    assert [f.name for f in (tmp_path / "img").iterdir()] == [ASSET]
+    assert (tmp_path / "img" / ASSET).read_bytes() == PNG
+
+@pytest.mark.parametrize("converter", CONVERTERS)
+def test_pictures_are_left_out_without_assets(converter):
+    assert "<img" not in converter.convert(UPLOAD)
+
+@pytest.mark.parametrize("converter", CONVERTERS)
+def test_a_cached_page_writes_its_pictures_again(converter, tmp_path):
+    source = tmp_path / "in.docx"
+    source.write_bytes(UPLOAD)
+    assets = AssetOptions(str(tmp_path / "img"), "img/")
+    cache = ConversionCache(tmp_path / "cache")
+    fingerprint = converter.cache_fingerprint(assets=assets)
+    to_stream = lambda *args, **kwargs: converter.convert_to_stream(*args, assets=assets, **kwargs)  # noqa: E731
+
+    first = cached_convert(to_stream, source, cache, fingerprint, assets=assets)
+    (tmp_path / "img" / ASSET).unlink()
+    assert cached_convert(to_stream, source, cache, fingerprint, assets=assets) == first
+    assert (tmp_path / "img" / ASSET).read_bytes() == PNG
+
+@pytest.mark.parametrize("converter", CONVERTERS)
+def test_asset_options_are_part_of_the_cache_fingerprint(converter):
+    fingerprints = {converter.cache_fingerprint(),
+                    converter.cache_fingerprint(assets=AssetOptions("/site/img", "img/")),
+                    converter.cache_fingerprint(assets=AssetOptions("/site/img", "/static/img/")),
+                    converter.cache_fingerprint(assets=AssetOptions("/other/img", "img/"))}
+    assert len(fingerprints) == 4
@@ -0,0 +1,39 @@
+import asyncio
+
+import docx_to_gcweb_html
+from docx_async import AsyncConverter
+from wordml import docx, p
+
+UPLOAD = docx(p("Title", style="Heading1"), p("Body"))
+
+async def collect(chunks) -> str:
+    return "".join([chunk async for chunk in chunks])
+
+def test_convert_async_equals_convert_across_event_loops():
+    # The shared converter outlives each asyncio.run() and must work in the next loop
+    for _ in range(2):
+        assert asyncio.run(collect(docx_to_gcweb_html.convert_async(UPLOAD))) == docx_to_gcweb_html.convert(UPLOAD)
+
+def test_concurrent_conversions_over_the_limit_all_finish():
+    converter = AsyncConverter(docx_to_gcweb_html.convert_to_stream, max_workers=2, max_concurrency=1,
+                               chunk_size=16, max_pending_chunks=1)
+
+    async def run():
+        return await asyncio.gather(*[collect(converter.convert(UPLOAD)) for _ in range(4)])
+
+    try:
+        assert asyncio.run(run()) == [docx_to_gcweb_html.convert(UPLOAD)] * 4
+    finally:
+        converter.close()
+
+def test_async_stream_source():
+    class Stream:
+        def __init__(self, data):
+            self.data = data
+
+        async def read(self, n):
+            part, self.data = self.data[:n], self.data[n:]
+            return part
+
+    page = asyncio.run(collect(docx_to_gcweb_html.convert_async(Stream(UPLOAD))))
+    assert page == docx_to_gcweb_html.convert(UPLOAD)
@@ -0,0 +1,63 @@
+import pytest
+
+import docx_to_gcweb_html
+import docx_to_gcweb_html_extended
+from docx_cache import ConversionCache, cached_convert
+from wordml import abstract_num, docx, num, p, tbl, tc, tr
+
+CONVERTERS = (docx_to_gcweb_html, docx_to_gcweb_html_extended)
+ENGINES = ("docx", "stream")
+NUMBERING = [abstract_num(1, ["bullet", "decimal"]), num(1, 1)]
+
+UPLOAD = docx(p("Title", style="Heading1"), p("a", num_id=1), p("b", num_id=1, ilvl=1),
+              p(style="WETAccordionStart"), p("Q", "WETAccordionHeading"), p("A", "WETAccordionPanel"),
+              p(style="WETAccordionEnd"), *[p(f"Body {i}") for i in range(20)],
+              tbl(tr(tc("H1"), tc("H2")), tr(tc("x", span=2)), tr(tc("y"), tc("z"))), p("End"),
+              numbering=NUMBERING)
+
+def entries(cache: ConversionCache):
+    return sorted(cache.cache_dir.glob("*/*.html"))
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "page.docx"
+    path.write_bytes(UPLOAD)
+    return path
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("converter", CONVERTERS)
+def test_cached_output_equals_convert(converter, engine, source, tmp_path):
+    cache = ConversionCache(tmp_path / "cache")
+    fingerprint = converter.cache_fingerprint()
+    expected = converter.convert(source, engine=engine)
+    assert cached_convert(converter.convert_to_stream, source, cache, fingerprint, engine) == expected  # miss
+    assert len(entries(cache)) == 1
+    assert cached_convert(converter.convert_to_stream, source, cache, fingerprint, engine) == expected  # hit
+    assert cached_convert(converter.convert_to_stream, source, ConversionCache(cache.cache_dir),
+                          fingerprint, engine) == expected  # hit, in a later run
+    assert len(entries(cache)) == 1
+
+def test_an_edited_document_is_a_miss(source, tmp_path):
+    cache = ConversionCache(tmp_path / "cache")
+    fingerprint = docx_to_gcweb_html.cache_fingerprint()
+    cached_convert(docx_to_gcweb_html.convert_to_stream, source, cache, fingerprint)
+    source.write_bytes(docx(p("Edited"), numbering=NUMBERING))
+    assert cached_convert(docx_to_gcweb_html.convert_to_stream, source, cache, fingerprint) == \
+        docx_to_gcweb_html.convert(source)
+    assert len(entries(cache)) == 2
+
+def test_each_converter_and_option_has_its_own_entry(source, tmp_path):
+    cache = ConversionCache(tmp_path / "cache")
+    fingerprints = {docx_to_gcweb_html.cache_fingerprint(), docx_to_gcweb_html.cache_fingerprint(table_page_rows=1),
+                    docx_to_gcweb_html_extended.cache_fingerprint()}
+    assert len(fingerprints) == 3
+    for fingerprint in fingerprints:
+        cached_convert(docx_to_gcweb_html.convert_to_stream, source, cache, fingerprint)
+    assert len(entries(cache)) == 3
+
+def test_the_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ConversionCache(tmp_path / "cache", max_bytes=10)
+    for i in range(3):
+        cache.put(f"{i:02d}" * 32, "x" * 6)
+    assert cache.get("00" * 32) is None and cache.get("01" * 32) is None
+    assert cache.get("02" * 32) == "x" * 6  # the newest entry stays, even over the limit
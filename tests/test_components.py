@@ -0,0 +1,63 @@
+import pytest
+
+import docx_to_gcweb_html_extended
+from wordml import abstract_num, docx, num, p, tbl, tc, tr
+
+ENGINES = ("docx", "stream")
+
+TABLE = tbl(tr(tc("H")), tr(tc("v")))
+TABLE_HTML = "<table class='table'><thead><tr><th scope='col'>H</th></tr></thead><tbody><tr><td>v</td></tr></tbody></table>"
+
+def convert(*body: str, engine: str) -> str:
+    upload = docx(*body, numbering=[abstract_num(1, ["bullet"]), num(1, 1)])
+    return docx_to_gcweb_html_extended.convert(upload, engine=engine)
+
+def page(*lines: str) -> str:
+    return "\n".join(["<main property='mainContentOfPage' class='container'>", *lines, "</main>"])
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_accordion_items_collect_their_panels(engine):
+    assert convert(p(style="WETAccordionStart"), p("Q1", "WETAccordionHeading"), p("A1", "WETAccordionPanel"),
+                   p("more"), p("Q2", "WETAccordionHeading"), p("A2", "WETAccordionPanel"),
+                   p(style="WETAccordionEnd"), p("after"), engine=engine) == page(
+        "<section class='wb-accordion'>",
+        "<details>", "<summary>Q1</summary>", "<p>A1</p>", "<p>more</p>", "</details>",
+        "<details>", "<summary>Q2</summary>", "<p>A2</p>", "</details>",
+        "</section>", "<p>after</p>")
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_accordion_items_are_plain_text_outside_an_accordion(engine):
+    assert convert(p("Q", "WETAccordionHeading"), engine=engine) == page("<p>Q</p>")
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_an_open_accordion_item_takes_other_markers_as_panel_text(engine):
+    assert convert(p(style="WETAccordionStart"), p("Q", "WETAccordionHeading"), p("Page", "WETPaginationStart"),
+                   TABLE, p(style="WETAccordionEnd"), engine=engine) == page(
+        "<section class='wb-accordion'>", "<details>", "<summary>Q</summary>", "<p>Page</p>",
+        TABLE_HTML, "</details>", "</section>")
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_pagination_items_and_closing(engine):
+    assert convert(p(style="WETPaginationStart"), p("Prev", "WETPaginationDisabled"), p("1", "WETPaginationActive"),
+                   p("2", "WETPaginationItem"), p(style="WETPaginationEnd"),
+                   p(style="WETPaginationStart"), p("1", "WETPaginationItem"), p("plain"),
+                   p(style="WETPaginationStart"), p("1", "WETPaginationItem"), TABLE, engine=engine) == page(
+        "<nav aria-label='Pagination'><ul class='pagination'>",
+        "<li class='disabled'><span>Prev</span></li>",
+        "<li class='active'><a href='#' aria-current='page'>1</a></li>",
+        "<li><a href='#'>2</a></li>", "</ul></nav>",
+        "<nav aria-label='Pagination'><ul class='pagination'>", "<li><a href='#'>1</a></li>", "</ul></nav>",
+        "<p>plain</p>",
+        "<nav aria-label='Pagination'><ul class='pagination'>", "<li><a href='#'>1</a></li>", "</ul></nav>",
+        TABLE_HTML)
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_details_close_an_open_list_and_are_closed_by_other_content(engine):
+    assert convert(p("a", num_id=1), p("S", "WETDetailsSummary"), p("C1", "WETDetailsContent"),
+                   p("C2", "WETDetailsContent"), p("after"), p("C", "WETDetailsContent"), TABLE,
+                   engine=engine) == page(
+        "<ul>", "<li>a</li>", "</ul>",
+        "<details>", "<summary>S</summary>", "<p>C1</p>", "<p>C2</p>", "</details>",
+        "<p>after</p>",
+        "<details><summary>Details</summary>", "<p>C</p>", "</details>",
+        TABLE_HTML)
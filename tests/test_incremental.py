@@ -0,0 +1,59 @@
+import pytest
+
+import docx_to_gcweb_html
+import docx_to_gcweb_html_extended
+from docx_incremental import BlockMemo
+from wordml import abstract_num, docx, num, p, tbl, tc, tr
+
+CONVERTERS = (docx_to_gcweb_html, docx_to_gcweb_html_extended)
+ENGINES = ("docx", "stream")
+NUMBERING = [abstract_num(1, ["bullet", "decimal"]), num(1, 1)]
+
+BODY = [p("Title", style="Heading1"), p("a", num_id=1), p("b", num_id=1, ilvl=1), p("c", num_id=1),
+        p(style="WETAccordionStart"), p("Q", "WETAccordionHeading"), p("A", "WETAccordionPanel"),
+        p(style="WETAccordionEnd"),
+        *[p(f"Body {i}") for i in range(10)],
+        tbl(tr(tc("H1"), tc("H2")), tr(tc("x", span=2))), p("End")]
+
+EDITS = {
+    "unchanged": BODY,
+    "text edited": [*BODY[:10], p("Body edited"), *BODY[11:]],
+    "list item removed": [*BODY[:2], *BODY[3:]],
+    "accordion end removed": [*BODY[:7], *BODY[8:]],
+    "heading became a list item": [p("Title", num_id=1), *BODY[1:]],
+}
+
+def run(converter, memo_path, body, engine):
+    memo = BlockMemo.load(memo_path, converter.cache_fingerprint())
+    html = converter.convert(docx(*body, numbering=NUMBERING), engine=engine, block_memo=memo)
+    memo.save(memo_path)
+    return html, memo
+
+@pytest.mark.parametrize("edit", EDITS)
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("converter", CONVERTERS)
+def test_incremental_output_equals_convert(converter, engine, edit, tmp_path):
+    memo_path = tmp_path / "page.memo.json"
+    html, memo = run(converter, memo_path, BODY, engine)
+    assert html == converter.convert(docx(*BODY, numbering=NUMBERING), engine=engine)
+    assert memo.reused == 0
+
+    body = EDITS[edit]
+    html, memo = run(converter, memo_path, body, engine)
+    assert html == converter.convert(docx(*body, numbering=NUMBERING), engine=engine)
+    assert memo.reused > 0
+    assert memo.rendered < len(body) and (memo.rendered == 0 or edit != "unchanged")
+
+def test_a_memo_of_another_converter_starts_empty(tmp_path):
+    memo_path = tmp_path / "page.memo.json"
+    run(docx_to_gcweb_html, memo_path, BODY, "docx")
+    html, memo = run(docx_to_gcweb_html_extended, memo_path, BODY, "docx")
+    assert memo.reused == 0
+    assert html == docx_to_gcweb_html_extended.convert(docx(*BODY, numbering=NUMBERING))
+
+def test_a_memo_of_other_table_page_rows_starts_empty(tmp_path):
+    memo_path = tmp_path / "page.memo.json"
+    run(docx_to_gcweb_html, memo_path, BODY, "docx")
+    memo = BlockMemo.load(memo_path, docx_to_gcweb_html.cache_fingerprint(table_page_rows=1))
+    docx_to_gcweb_html.convert(docx(*BODY, numbering=NUMBERING), table_page_rows=1, block_memo=memo)
+    assert memo.reused == 0
@@ -0,0 +1,15 @@
+import gc
+
+import docx_ir
+import docx_to_gcweb_html
+from wordml import docx, tbl, tc, tr
+
+def test_parsing_a_big_table_leaves_the_collector_alone(monkeypatch):
+    # Library calls may run inside a host's process, whose collector setting is its own
+    def refuse():
+        raise AssertionError("gc.disable() called by library code")
+    monkeypatch.setattr(gc, "disable", refuse)
+    upload = docx(tbl(*[tr(tc(f"r{i}"), tc("x")) for i in range(3000)]))
+    blocks, _ = docx_ir.iter_document(upload)
+    assert len(list(blocks)[0].rows) == 3000
+    assert docx_to_gcweb_html.convert(upload, engine="stream").count("<tr>") == 3000
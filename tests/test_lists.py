@@ -0,0 +1,50 @@
+import pytest
+
+import docx_to_gcweb_html
+from wordml import abstract_num, docx, num, p
+
+ENGINES = ("docx", "stream")
+
+# numId 1: bullet / decimal / bullet levels; numId 2: the same list with level 0 overridden to decimal
+NUMBERING = [abstract_num(1, ["bullet", "decimal", "bullet"]), num(1, 1), num(2, 1, {0: "decimal"})]
+
+def convert(*body: str, engine: str) -> str:
+    return docx_to_gcweb_html.convert(docx(*body, numbering=NUMBERING), engine=engine)
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_ilvl_nests_lists_inside_their_parent_item(engine):
+    page = convert(p("a", num_id=1), p("b", num_id=1, ilvl=1), p("c", num_id=1, ilvl=2),
+                   p("d", num_id=1), engine=engine)
+    assert page == ("<main property='mainContentOfPage' class='container'>\n"
+                    "<ul>\n<li>a\n<ol>\n<li>b\n<ul>\n<li>c</li>\n</ul>\n</li>\n</ol>\n</li>\n"
+                    "<li>d</li>\n</ul>\n</main>")
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_ilvl_deeper_than_the_open_lists_nests_one_level(engine):
+    page = convert(p("a", num_id=1), p("b", num_id=1, ilvl=2), engine=engine)
+    assert page == ("<main property='mainContentOfPage' class='container'>\n"
+                    "<ul>\n<li>a\n<ul>\n<li>b</li>\n</ul>\n</li>\n</ul>\n</main>")
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_kind_switch_at_the_same_level_starts_a_new_list(engine):
+    page = convert(p("a", num_id=1), p("b", num_id=2), p("c", style="ListBullet"), engine=engine)
+    assert page == ("<main property='mainContentOfPage' class='container'>\n"
+                    "<ul>\n<li>a</li>\n</ul>\n<ol>\n<li>b</li>\n</ol>\n<ul>\n<li>c</li>\n</ul>\n</main>")
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_lvl_override_changes_only_its_level(engine):
+    page = convert(p("a", num_id=2), p("b", num_id=2, ilvl=1), p("c", num_id=2, ilvl=2), engine=engine)
+    assert page == ("<main property='mainContentOfPage' class='container'>\n"
+                    "<ol>\n<li>a\n<ol>\n<li>b\n<ul>\n<li>c</li>\n</ul>\n</li>\n</ol>\n</li>\n</ol>\n</main>")
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_num_id_0_switches_numbering_off(engine):
+    page = convert(p("a", num_id=1), p("b", style="ListBullet", num_id=0), p("c", num_id=1), engine=engine)
+    assert page == ("<main property='mainContentOfPage' class='container'>\n"
+                    "<ul>\n<li>a</li>\n</ul>\n<p>b</p>\n<ul>\n<li>c</li>\n</ul>\n</main>")
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_heading_closes_open_lists(engine):
+    page = convert(p("a", num_id=1), p("b", num_id=1, ilvl=1), p("T", style="Heading1"), engine=engine)
+    assert page == ("<main property='mainContentOfPage' class='container'>\n"
+                    "<ul>\n<li>a\n<ol>\n<li>b</li>\n</ol>\n</li>\n</ul>\n<h1>T</h1>\n</main>")
@@ -0,0 +1,65 @@
+import io
+import marshal
+
+import pytest
+
+import docx_to_gcweb_html
+import docx_to_gcweb_html_extended
+from docx_cache import ParseCache
+from wordml import abstract_num, docx, num, p, tbl, tc, tr
+
+CONVERTERS = (docx_to_gcweb_html, docx_to_gcweb_html_extended)
+ENGINES = ("docx", "stream")
+
+UPLOAD = docx(p("Title", style="Heading1"), p("a", num_id=1), p("b", num_id=1, ilvl=1),
+              *[p(f"Body {i}") for i in range(20)],
+              tbl(tr(tc("H1"), tc("H2")), tr(tc("x", span=2)), tr(tc("y"), tc("z"))), p("End"),
+              numbering=[abstract_num(1, ["bullet", "decimal"]), num(1, 1)])
+
+def entries(cache: ParseCache):
+    return sorted(cache.cache_dir.glob("*/*"))
+
+def records(data: bytes):
+    """The block records of an entry, up to its end record."""
+    f = io.BytesIO(data)
+    stored = []
+    while (record := marshal.load(f)) is not None:
+        stored.extend(record)
+    return stored
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("converter", CONVERTERS)
+def test_parse_cache_output_equals_convert(converter, engine, tmp_path):
+    cache = ParseCache(tmp_path)
+    expected = converter.convert(UPLOAD, engine=engine)
+    assert converter.convert(UPLOAD, engine=engine, parse_cache=cache) == expected  # miss, stored
+    assert len(entries(cache)) == 1
+    assert converter.convert(UPLOAD, engine=engine, parse_cache=cache) == expected  # hit
+    assert converter.convert(UPLOAD, engine=engine, parse_cache=cache, table_page_rows=1) == \
+        converter.convert(UPLOAD, engine=engine, table_page_rows=1)
+
+@pytest.mark.parametrize("cut", [0, 1, 0.5, -1])
+def test_an_entry_cut_short_is_parsed_again_from_where_it_broke_off(cut, tmp_path):
+    cache = ParseCache(tmp_path)
+    expected = docx_to_gcweb_html.convert(UPLOAD)
+    docx_to_gcweb_html.convert(UPLOAD, parse_cache=cache)
+    [entry] = entries(cache)
+    data = entry.read_bytes()
+    entry.write_bytes(data[:int(len(data) * cut) if isinstance(cut, float) else cut])
+    assert docx_to_gcweb_html.convert(UPLOAD, parse_cache=cache) == expected
+    assert entries(cache) == [entry] and records(entry.read_bytes()) == records(data)  # stored anew
+
+@pytest.mark.parametrize("junk", [b"\x80\x04garbage", b"\xe9" * 40, b"i\x07\x00\x00\x00N"])
+def test_a_foreign_entry_is_a_miss(junk, tmp_path):
+    cache = ParseCache(tmp_path)
+    docx_to_gcweb_html.convert(UPLOAD, parse_cache=cache)
+    [entry] = entries(cache)
+    entry.write_bytes(junk)
+    assert docx_to_gcweb_html.convert(UPLOAD, parse_cache=cache) == docx_to_gcweb_html.convert(UPLOAD)
+
+def test_a_document_read_in_part_is_not_stored(tmp_path):
+    cache = ParseCache(tmp_path)
+    blocks, _ = cache.document(UPLOAD)
+    next(blocks)
+    blocks.close()
+    assert entries(cache) == []
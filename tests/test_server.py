@@ -0,0 +1,53 @@
+import json
+import os
+import signal
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import docx_server
+import docx_to_gcweb_html
+from wordml import docx, p
+
+UPLOAD = docx(p("Title", style="Heading1"), p("Body"))
+
+@pytest.fixture
+def server():
+    server = docx_server.ConversionServer(("127.0.0.1", 0), docx_to_gcweb_html.convert_to_stream,
+                                          workers=1, engine="docx", max_upload_bytes=2**20)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def request(server, path, data=None, headers=None):
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data, headers or {}), timeout=30) as r:
+            return r.status, r.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode("utf-8")
+
+def test_convert_returns_the_page(server):
+    assert request(server, "/convert", UPLOAD) == (200, docx_to_gcweb_html.convert(UPLOAD))
+    assert request(server, "/healthz") == (200, "ok\n")
+
+def test_negative_content_length_is_rejected(server):
+    assert request(server, "/convert", b"", {"Content-Length": "-1"})[0] == 400
+
+def test_a_killed_worker_is_replaced_and_the_request_retried(server):
+    os.kill(server.pool.submit(docx_server._ping).result(), signal.SIGKILL)
+    assert request(server, "/convert", UPLOAD) == (200, docx_to_gcweb_html.convert(UPLOAD))
+    assert json.loads(request(server, "/metrics")[1])["pool_restarts"] == 1
+    assert request(server, "/healthz") == (200, "ok\n")
+
+def test_healthz_fails_while_the_pool_cannot_be_restarted(server, monkeypatch):
+    def no_pool(*args):
+        raise OSError("out of processes")
+    monkeypatch.setattr(docx_server, "start_pool", no_pool)
+    os.kill(server.pool.submit(docx_server._ping).result(), signal.SIGKILL)
+    assert request(server, "/convert", UPLOAD)[0] == 503
+    assert request(server, "/healthz") == (503, "worker pool down\n")
@@ -0,0 +1,65 @@
+import pytest
+
+import docx_to_gcweb_html
+from wordml import docx, tbl, tc, tr
+
+ENGINES = ("docx", "stream")
+
+def convert(*body: str, engine: str, table_page_rows=None) -> str:
+    return docx_to_gcweb_html.convert(docx(*body), engine=engine, table_page_rows=table_page_rows)
+
+def page(*fragments: str) -> str:
+    return "\n".join(["<main property='mainContentOfPage' class='container'>", *fragments, "</main>"])
+
+HEAD = "<thead><tr><th scope='col'>H1</th><th scope='col' colspan='2'>H2</th></tr></thead>"
+
+# A header cell merged down into the body, then a body cell merged down three rows
+MERGED = tbl(tr(tc("H1", vmerge="restart"), tc("H2", span=2)),
+             tr(tc(vmerge="continue"), tc("a"), tc("b")),
+             tr(tc("m", vmerge="restart"), tc("c", span=2)),
+             tr(tc(vmerge="continue"), tc("d"), tc("e")),
+             tr(tc(vmerge="continue"), tc("f"), tc("g")))
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_grid_span_and_v_merge_stop_at_the_thead(engine):
+    assert convert(MERGED, engine=engine) == page(
+        "<table class='table'>" + HEAD + "<tbody><tr><td></td><td>a</td><td>b</td></tr>"
+        "<tr><td rowspan='3'>m</td><td colspan='2'>c</td></tr>"
+        "<tr><td>d</td><td>e</td></tr><tr><td>f</td><td>g</td></tr></tbody></table>")
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_v_merge_stops_at_a_page_boundary(engine):
+    assert convert(MERGED, engine=engine, table_page_rows=2) == page(
+        "<div id='table-1-page-1'><table class='table'>" + HEAD
+        + "<tbody><tr><td></td><td>a</td><td>b</td></tr><tr><td>m</td><td colspan='2'>c</td></tr></tbody></table>"
+        "<nav aria-label='Pagination'><ul class='pagination'><li class='disabled'><span>Previous</span></li>"
+        "<li class='active'><a href='#table-1-page-1' aria-current='page'>1</a></li>"
+        "<li><a href='#table-1-page-2'>2</a></li><li><a href='#table-1-page-2' rel='next'>Next</a></li>"
+        "</ul></nav></div>",
+        "<div id='table-1-page-2'><table class='table'>" + HEAD
+        + "<tbody><tr><td rowspan='2'></td><td>d</td><td>e</td></tr><tr><td>f</td><td>g</td></tr></tbody></table>"
+        "<nav aria-label='Pagination'><ul class='pagination'><li><a href='#table-1-page-1' rel='prev'>Previous</a></li>"
+        "<li><a href='#table-1-page-1'>1</a></li>"
+        "<li class='active'><a href='#table-1-page-2' aria-current='page'>2</a></li>"
+        "<li class='disabled'><span>Next</span></li></ul></nav></div>")
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_grid_before_pads_rows_and_aligns_merges(engine):
+    table = tbl(tr(tc("A"), tc("B"), tc("C")),
+                tr(tc("x", vmerge="restart"), tc("y"), grid_before=1),
+                tr(tc(vmerge="continue"), tc("z"), grid_before=1),
+                tr(tc("w", span=3)))
+    assert convert(table, engine=engine) == page(
+        "<table class='table'><thead><tr><th scope='col'>A</th><th scope='col'>B</th><th scope='col'>C</th></tr>"
+        "</thead><tbody><tr><td></td><td rowspan='2'>x</td><td>y</td></tr><tr><td></td><td>z</td></tr>"
+        "<tr><td colspan='3'>w</td></tr></tbody></table>")
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_v_merge_continues_the_cell_in_the_same_grid_column(engine):
+    # gridBefore shifts the continuing cell under "y", not under the first cell of the row above
+    table = tbl(tr(tc("A"), tc("B")),
+                tr(tc("x", vmerge="restart"), tc("y")),
+                tr(tc(vmerge="continue"), grid_before=1))
+    assert convert(table, engine=engine) == page(
+        "<table class='table'><thead><tr><th scope='col'>A</th><th scope='col'>B</th></tr></thead>"
+        "<tbody><tr><td>x</td><td rowspan='2'>y</td></tr><tr><td></td></tr></tbody></table>")
@@ -0,0 +1,50 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import docx_to_gcweb_html
+import docx_to_gcweb_html_extended
+from wordml import abstract_num, docx, num, p, tbl, tc, tr
+
+CONVERTERS = (docx_to_gcweb_html, docx_to_gcweb_html_extended)
+ENGINES = ("docx", "stream")
+REPO = Path(__file__).resolve().parent.parent
+
+UPLOAD = docx(p("Title", style="Heading1"), p("Intro"), p("a", num_id=1), p("   "),
+              tbl(tr(tc("H1"), tc("H2")), tr(tc("x", span=2)), tr(tc(""), tc(""))), p("End"),
+              numbering=[abstract_num(1, ["bullet"]), num(1, 1)])
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("converter", CONVERTERS)
+def test_targets_render_one_parse(converter, engine):
+    html, text, outline = converter.convert(UPLOAD, engine=engine, renderers=["html", "text", "outline"])
+    assert html == converter.convert(UPLOAD, engine=engine)
+    assert text == "\n".join(["Title", "Intro", "a", "H1\tH2", "x", "End"])
+    assert json.loads(outline) == [{"level": 1, "text": "Title", "children": []}]
+
+def test_a_renderer_function_is_a_target():
+    def names(blocks, image_part):
+        return (type(block).__name__ for block in blocks)
+    [rendered] = docx_to_gcweb_html.convert(UPLOAD, renderers=[names])
+    assert rendered.split("\n") == ["Paragraph"] * 4 + ["Table", "Paragraph"]
+
+@pytest.mark.parametrize("renderers", [[], ["pdf"]])
+def test_no_or_unknown_renderers_are_rejected(renderers):
+    with pytest.raises(ValueError):
+        docx_to_gcweb_html.convert(UPLOAD, renderers=renderers)
+
+@pytest.mark.parametrize("flags", [
+    ["--incremental", "memo.json", "--cache-dir", "cache"],
+    ["--incremental", "memo.json", "--serve", "0"],
+    ["--profile", "--serve", "0"],
+    ["--incremental", "memo.json", "--batch", "in", "--out-dir", "out"],
+    ["--text-output", "page.txt", "--cache-dir", "cache"],
+])
+def test_the_cli_rejects_options_that_do_not_combine(flags, tmp_path):
+    result = subprocess.run([sys.executable, str(REPO / "docx_to_gcweb_html.py"), "page.docx", *flags],
+                            cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "cannot be combined" in result.stderr or "not with" in result.stderr
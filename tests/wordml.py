@@ -0,0 +1,129 @@
+"""
+Hand-built WordprocessingML packages for the converter tests.
+
+Each helper returns a fragment of WordprocessingML; docx() wraps body
+fragments (and optional numbering definitions and pictures) into the bytes
+of a minimal .docx, which the converters read like a file.
+"""
+
+from __future__ import annotations
+import io
+import zipfile
+from typing import Dict, Optional, Sequence
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+RT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Default Extension="png" ContentType="image/png"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>
+<Override PartName="/word/numbering.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.numbering+xml"/>
+</Types>"""
+
+PACKAGE_RELS = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="{RT}/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+def _document_rels(media: Dict[str, str]) -> str:
+    images = "".join(f'<Relationship Id="{r_id}" Type="{RT}/image" Target="media/{name}"/>'
+                     for r_id, name in media.items())
+    return f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="{RT}/styles" Target="styles.xml"/>
+<Relationship Id="rId2" Type="{RT}/numbering" Target="numbering.xml"/>{images}
+</Relationships>"""
+
+# The paragraph styles the tests use, by styleId
+STYLES = {
+    "Normal": "Normal",
+    "Heading1": "heading 1",
+    "Heading2": "heading 2",
+    "ListBullet": "List Bullet",
+    "ListNumber": "List Number",
+}
+# The extended converter's component and marker styles, with their names as ids minus the spaces
+STYLES.update({name.replace(" ", ""): name for name in (
+    "WET Accordion Start", "WET Accordion Heading", "WET Accordion Panel", "WET Accordion End",
+    "WET Pagination Start", "WET Pagination Item", "WET Pagination Active", "WET Pagination Disabled",
+    "WET Pagination End", "WET Details Summary", "WET Details Content", "WET Table Striped", "WET Lead")})
+
+def _styles_xml() -> str:
+    styles = [f'<w:style w:type="paragraph" w:styleId="{style_id}"'
+              + (' w:default="1"' if style_id == "Normal" else "")
+              + f'><w:name w:val="{name}"/></w:style>'
+              for style_id, name in STYLES.items()]
+    return f'<w:styles xmlns:w="{W_NS}">' + "".join(styles) + "</w:styles>"
+
+def p(text: str = "", style: Optional[str] = None, num_id: Optional[int] = None, ilvl: int = 0) -> str:
+    """A paragraph with one run of *text*, a style id and direct numbering (numId, ilvl)."""
+    props = f'<w:pStyle w:val="{style}"/>' if style else ""
+    if num_id is not None:
+        props += f'<w:numPr><w:ilvl w:val="{ilvl}"/><w:numId w:val="{num_id}"/></w:numPr>'
+    run = f"<w:r><w:t>{text}</w:t></w:r>" if text else ""
+    return f"<w:p><w:pPr>{props}</w:pPr>{run}</w:p>" if props else f"<w:p>{run}</w:p>"
+
+def picture(r_id: str, alt: str = "", cx: int = 952500, cy: int = 476250) -> str:
+    """A paragraph showing the inline picture related as *r_id*, sized *cx* x *cy* EMU (100 x 50 px)."""
+    return (f'<w:p><w:r><w:drawing><wp:inline><wp:extent cx="{cx}" cy="{cy}"/><wp:docPr id="1" descr="{alt}"/>'
+            f'<a:graphic><a:graphicData><a:blip r:embed="{r_id}"/></a:graphicData></a:graphic>'
+            "</wp:inline></w:drawing></w:r></w:p>")
+
+def tc(*blocks: str, span: int = 1, vmerge: Optional[str] = None) -> str:
+    """A table cell holding *blocks* (one paragraph each for plain strings), with gridSpan/vMerge."""
+    props = f'<w:gridSpan w:val="{span}"/>' if span > 1 else ""
+    if vmerge == "restart":
+        props += '<w:vMerge w:val="restart"/>'
+    elif vmerge == "continue":
+        props += "<w:vMerge/>"
+    content = "".join(b if b.startswith("<") else p(b) for b in blocks) or p()
+    return f"<w:tc><w:tcPr>{props}</w:tcPr>{content}</w:tc>"
+
+def tr(*cells: str, grid_before: int = 0) -> str:
+    """A table row of *cells*, after *grid_before* empty grid columns."""
+    props = f'<w:trPr><w:gridBefore w:val="{grid_before}"/></w:trPr>' if grid_before else ""
+    return f"<w:tr>{props}{''.join(cells)}</w:tr>"
+
+def tbl(*rows: str) -> str:
+    return f"<w:tbl>{''.join(rows)}</w:tbl>"
+
+def abstract_num(abstract_id: int, formats: Sequence[str]) -> str:
+    """An abstractNum whose level i is numbered with formats[i] ("bullet", "decimal", ...)."""
+    levels = "".join(f'<w:lvl w:ilvl="{i}"><w:numFmt w:val="{fmt}"/></w:lvl>' for i, fmt in enumerate(formats))
+    return f'<w:abstractNum w:abstractNumId="{abstract_id}">{levels}</w:abstractNum>'
+
+def num(num_id: int, abstract_id: int, overrides: Optional[dict] = None) -> str:
+    """A num instance of an abstractNum, with lvlOverrides mapping ilvl to a numFmt."""
+    body = f'<w:abstractNumId w:val="{abstract_id}"/>'
+    for ilvl, fmt in (overrides or {}).items():
+        body += (f'<w:lvlOverride w:ilvl="{ilvl}"><w:lvl w:ilvl="{ilvl}">'
+                 f'<w:numFmt w:val="{fmt}"/></w:lvl></w:lvlOverride>')
+    return f'<w:num w:numId="{num_id}">{body}</w:num>'
+
+def docx(*body: str, numbering: Sequence[str] = (), media: Optional[Dict[str, bytes]] = None) -> bytes:
+    """
+    The bytes of a .docx whose body is *body*, whose numbering part holds
+    *numbering* and which relates each rId of *media* to an image part with those bytes.
+    """
+    media = media or {}
+    names = {r_id: f"image{i}.png" for i, r_id in enumerate(media, 1)}
+    document = (f'<w:document xmlns:w="{W_NS}" xmlns:r="{R_NS}" xmlns:wp="{WP_NS}" xmlns:a="{A_NS}"><w:body>'
+                + "".join(body) + "<w:sectPr/></w:body></w:document>")
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("[Content_Types].xml", CONTENT_TYPES)
+        zf.writestr("_rels/.rels", PACKAGE_RELS)
+        zf.writestr("word/_rels/document.xml.rels", _document_rels(names))
+        zf.writestr("word/document.xml", document)
+        zf.writestr("word/styles.xml", _styles_xml())
+        zf.writestr("word/numbering.xml", f'<w:numbering xmlns:w="{W_NS}">' + "".join(numbering) + "</w:numbering>")
+        for r_id, data in media.items():
+            zf.writestr(f"word/media/{names[r_id]}", data)
+    return buf.getvalue()